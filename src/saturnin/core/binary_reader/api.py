@@ -40,7 +40,7 @@ data pipe.
 """
 
 from __future__ import annotations
-from firebird.base.config import StrOption, IntOption
+from firebird.base.config import StrOption, IntOption, BoolOption
 import uuid
 from functools import partial
 from saturnin.base import create_config, VENDOR_UID, Error, AgentDescriptor, ServiceDescriptor
@@ -65,6 +65,15 @@ class BinaryReaderConfig(DataProviderConfig):
             (IntOption('block_size',
                        "Data block size in bytes (-1 when size is stored before the data)",
                        required=True, signed=True))
+        #: Map regular input file into memory instead of reading it
+        self.use_mmap: BoolOption = \
+            BoolOption('use_mmap', "Map regular input file into memory instead of reading it",
+                       required=True, default=False)
+        #: Size of mapped input file region that is prefetched ahead of sent data
+        self.prefetch_window: IntOption = \
+            IntOption('prefetch_window',
+                      "Size of file region prefetched ahead in bytes (0 disables prefetch)",
+                      required=True, default=4194304)
     def validate(self) -> None:
         """Extended validation.
 
@@ -40,12 +40,23 @@ data pipe.
 """
 
 from __future__ import annotations
-from typing import BinaryIO, cast
-from struct import unpack
+from typing import BinaryIO, Callable, cast
+from struct import Struct
+import os
+import stat
+import mmap
+from zmq import Frame
 from saturnin.base import StopError, MIME, Channel
 from saturnin.lib.data.onepipe import DataProviderMicro, ErrorCode, FBDPSession, FBDPMessage
 from .api import BinaryReaderConfig
 
+#: Format of block size stored before the data
+_BLOCK_SIZE = Struct('!I')
+#: Maximum size of batch read for fixed size blocks
+_READ_BATCH_SIZE = 1024 * 1024
+#: Size of read buffer for standard streams (default pipe capacity on Linux)
+_STREAM_BUFFER_SIZE = 64 * 1024
+
 # Classes
 
 class BinaryReaderMicro(DataProviderMicro):
@@ -55,20 +66,140 @@ class BinaryReaderMicro(DataProviderMicro):
     def _open_file(self) -> None:
         "Open the input file."
         self._close_file()
-        if self.filename.lower() in self.SYSIO:
-            fspec = self.SYSIO.index(self.filename.lower())
-        else:
-            fspec = self.filename
         try:
-            self.file = open(fspec, mode='br',
-                             closefd=self.filename.lower() not in self.SYSIO)
+            # Block size and data are parsed from read buffer, that is refilled only
+            # when exhausted
+            self.file = open(self._fspec, mode='br', closefd=not self._sysio,
+                             buffering=_STREAM_BUFFER_SIZE if self._sysio else -1)
         except Exception as exc:
             raise StopError("Failed to open input file", code = ErrorCode.ERROR) from exc
+        self._data_pos = self._data_end = 0
+        self._view = self._data_view
+        if not self._sysio:
+            if self._use_mmap:
+                # Regular files are mapped into memory, and DATA frames are sent directly
+                # from mapped pages. Empty files, pipes etc. are read into buffer.
+                try:
+                    self._mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    pass
+                else:
+                    self._view = memoryview(self._mm)
+                    self._data_end = len(self._mm)
+                    if self._prefetch_window:
+                        # Prefetched regions are whole units of preferred I/O size for the
+                        # file (rounded to pages)
+                        unit = os.fstat(self.file.fileno()).st_blksize
+                        unit = -(-max(unit, 1) // mmap.PAGESIZE) * mmap.PAGESIZE
+                        self._prefetch = -(-self._prefetch_window // unit) * unit
+                    self._prefetch_end = 0
+                    self._prefetch_mark = -1 if self._prefetch_window else self._data_end
+            # File is read once from start to end, let the kernel use larger read-ahead
+            try:
+                if self._mm is not None:
+                    if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                        self._mm.madvise(mmap.MADV_SEQUENTIAL)
+                elif hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(self.file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                pass
+        if self.block_size > 0:
+            self._produce = self._produce_fixed_mapped if self._mm is not None \
+                else self._produce_fixed
+            # Only regular files are read in batches, because read from pipe or device
+            # would wait until whole batch is available
+            if not self._sysio and stat.S_ISREG(os.fstat(self.file.fileno()).st_mode):
+                self._read_view = self._data_view
+            else:
+                self._read_view = self._data_view[:self.block_size]
+        else:
+            self._produce = self._produce_mapped if self._mm is not None \
+                else self._produce_prefixed
     def _close_file(self) -> None:
         "Close the input file if necessary"
+        if self._mm is not None:
+            self._view.release()
+            self._view = self._data_view
+            try:
+                self._mm.close()
+            except BufferError:
+                # Last DATA frame is still referenced, mapping is released with it
+                pass
+            self._mm = None
         if self.file:
             self.file.close()
             self.file = None
+        self._produce = self._open_and_produce
+    def _open_and_produce(self, msg: FBDPMessage) -> None:
+        "Open the input file that was not opened by client connection, and store first block."
+        self._open_file()
+        self._produce(msg)
+    def _produce_fixed(self, msg: FBDPMessage) -> None:
+        "Store next fixed size block from file into DATA message."
+        # Fixed size blocks are read in batches, and served from buffer
+        if self._data_pos == self._data_end:
+            self._data_pos = 0
+            self._data_end = self.file.readinto(self._read_view)
+            if not self._data_end:
+                raise StopError('OK', code=ErrorCode.OK)
+        start = self._data_pos
+        self._data_pos = min(start + self.block_size, self._data_end)
+        msg.data_frame = self._data_view[start:self._data_pos]
+    def _produce_fixed_mapped(self, msg: FBDPMessage) -> None:
+        "Store next fixed size block from mapped file into DATA message."
+        if (start := self._data_pos) == self._data_end:
+            raise StopError('OK', code=ErrorCode.OK)
+        self._data_pos = min(start + self.block_size, self._data_end)
+        if self._data_pos > self._prefetch_mark:
+            self._prefetch_next()
+        msg.data_frame = self._mapped_frame(start, self._data_pos)
+    def _prefetch_next(self) -> None:
+        "Advise the kernel to read next region of mapped file ahead of sent data."
+        start = self._prefetch_end
+        self._prefetch_end = min(start + self._prefetch, self._data_end)
+        # Next region is requested when data from previous one start to be sent
+        self._prefetch_mark = self._data_end if self._prefetch_end == self._data_end \
+            else self._prefetch_end - self._prefetch
+        try:
+            self._mm.madvise(mmap.MADV_WILLNEED, start, self._prefetch_end - start)
+        except OSError:
+            self._prefetch_mark = self._data_end
+    def _mapped_frame(self, start: int, end: int) -> Frame:
+        """Returns ZMQ frame with mapped file content. Mapped pages are never modified,
+        so frames above ZMQ copy threshold are sent without copying the data.
+        """
+        return Frame(self._view[start:end], copy=None)
+    def _produce_prefixed(self, msg: FBDPMessage) -> None:
+        "Store next size-prefixed block from file into DATA message."
+        if (n := self.file.readinto(self._size_buf)) == _BLOCK_SIZE.size:
+            size = _BLOCK_SIZE.unpack_from(self._size_buf)[0]
+        elif n == 0:
+            raise StopError('OK', code=ErrorCode.OK)
+        else:
+            raise StopError("Incomplete block size", code=ErrorCode.INVALID_DATA)
+        if size > len(self._data_buf):
+            self._data_buf = bytearray(size)
+            self._data_view = memoryview(self._data_buf)
+        if n := self.file.readinto(self._data_view[:size]):
+            # Frame is copied by ZMQ when the message is sent right after this handler
+            msg.data_frame = self._data_view[:n]
+        else:
+            raise StopError('OK', code=ErrorCode.OK)
+    def _produce_mapped(self, msg: FBDPMessage) -> None:
+        "Store next size-prefixed block from mapped file into DATA message."
+        pos = self._data_pos
+        if pos == self._data_end:
+            raise StopError('OK', code=ErrorCode.OK)
+        if pos + _BLOCK_SIZE.size > self._data_end:
+            raise StopError("Incomplete block size", code=ErrorCode.INVALID_DATA)
+        size = _BLOCK_SIZE.unpack_from(self._mm, pos)[0]
+        pos += _BLOCK_SIZE.size
+        if not size or pos == self._data_end:
+            raise StopError('OK', code=ErrorCode.OK)
+        self._data_pos = min(pos + size, self._data_end)
+        if self._data_pos > self._prefetch_mark:
+            self._prefetch_next()
+        msg.data_frame = self._mapped_frame(pos, self._data_pos)
     def initialize(self, config: BinaryReaderConfig) -> None:
         """Verify configuration and assemble component structural parts.
         """
@@ -77,8 +208,44 @@ class BinaryReaderMicro(DataProviderMicro):
         # Configuration
         self.fmt: MIME = config.pipe_format.value
         self.file: BinaryIO = None
+        #: Memory map of regular input file
+        self._mm: mmap.mmap = None
+        #: Whether regular input file should be mapped into memory
+        self._use_mmap: bool = config.use_mmap.value
+        #: Handler that stores next block into DATA message, selected when file is opened
+        self._produce: Callable[[FBDPMessage], None] = self._open_and_produce
         self.filename: str = config.filename.value
+        #: True when input is a standard stream
+        self._sysio: bool = self.filename.lower() in self.SYSIO
+        #: File name or descriptor passed to `open()`
+        self._fspec: str | int = self.SYSIO.index(self.filename.lower()) if self._sysio \
+            else self.filename
         self.block_size: int = config.block_size.value
+        #: Buffer for block size
+        self._size_buf: bytearray = bytearray(_BLOCK_SIZE.size)
+        #: Buffer for data blocks, reused for all DATA messages
+        self._data_buf: bytearray = bytearray()
+        if self.block_size > 0:
+            # Regular files are read in batches of fixed size blocks, see `_open_file()`
+            blocks = 1 if self._sysio \
+                else max(1, min(self.batch_size, _READ_BATCH_SIZE // self.block_size))
+            self._data_buf = bytearray(self.block_size * blocks)
+        self._data_view: memoryview = memoryview(self._data_buf)
+        #: Part of data buffer filled by single read of fixed size blocks
+        self._read_view: memoryview = self._data_view
+        #: Content of mapped file
+        self._view: memoryview = self._data_view
+        #: Configured prefetch window (0 when prefetch is disabled or not supported)
+        self._prefetch_window: int = config.prefetch_window.value \
+            if hasattr(mmap, 'MADV_WILLNEED') else 0
+        #: Size of mapped file region prefetched ahead of sent data
+        self._prefetch: int = 0
+        #: End of prefetched region, and position that triggers prefetch of next region
+        self._prefetch_end: int = 0
+        self._prefetch_mark: int = 0
+        #: Position of next block and end of valid data in batch buffer or mapped file
+        self._data_pos: int = 0
+        self._data_end: int = 0
     def handle_accept_client(self, channel: Channel, session: FBDPSession) -> None:
         """Event handler executed when client connects to the data pipe via OPEN message.
 
@@ -119,19 +286,7 @@ class BinaryReaderMicro(DataProviderMicro):
             ErrorCode. As we want to report INVALID_DATA properly, we have to convert
             exceptions into StopError.
         """
-        if self.file is None:
-            self._open_file()
-        if self.block_size == -1:
-            if buf := self.file.read(4):
-                size = unpack('!I', buf)[0]
-            else:
-                raise StopError('OK', code=ErrorCode.OK)
-        else:
-            size = self.block_size
-        if buf := self.file.read(size):
-            msg.data_frame = buf
-        else:
-            raise StopError('OK', code=ErrorCode.OK)
+        self._produce(msg)
     def handle_pipe_closed(self, channel: Channel, session: FBDPSession, msg: FBDPMessage,
                            exc: Exception=None) -> None:
         """Event handler executed when CLOSE message is received or sent, to release any
@@ -41,11 +41,14 @@ This microservice is a DATA_CONSUMER that wites binary data from input data pipe
 from __future__ import annotations
 from typing import BinaryIO, cast
 import os
-from struct import pack
+from struct import Struct
 from saturnin.base import StopError, MIME, FileOpenMode, Channel
 from saturnin.lib.data.onepipe import DataConsumerMicro, ErrorCode, FBDPSession, FBDPMessage
 from .api import BinaryWriterConfig, FileStorageType
 
+#: Format of block size stored before the data
+_BLOCK_SIZE = Struct('!I')
+
 # Classes
 
 class BinaryWriterMicro(DataConsumerMicro):
@@ -138,7 +141,7 @@ class BinaryWriterMicro(DataConsumerMicro):
         if self.file is None:
             self._open_file()
         if self.file_type is FileStorageType.BLOCK:
-            self.file.write(pack('!I', len(data)))
+            self.file.write(_BLOCK_SIZE.pack(len(data)))
         self.file.write(data)
     def handle_pipe_closed(self, channel: Channel, session: FBDPSession, msg: FBDPMessage,
                            exc: Exception=None) -> None:
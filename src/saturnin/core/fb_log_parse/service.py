@@ -48,6 +48,32 @@ from saturnin.base import StopError, MIME, MIME_TYPE_TEXT, MIME_TYPE_PROTO, Chan
 from saturnin.lib.data.filter import DataFilterMicro, ErrorCode, FBDPSession, FBDPMessage
 from .api import FbLogParserConfig, LOG_PROTO
 
+#: MIME parameters accepted for input pipe format
+_ALLOWED_INPUT_PARAMS = frozenset(('charset', 'errors'))
+
+#: Assignments of `LogMessage` attributes to `LOG_PROTO` fields
+_LOG_PROTO_FIELDS = (('origin', 'data.origin'),
+                     ('level', 'data.level.value'),
+                     ('code', 'data.code'),
+                     ('facility', 'data.facility.value'),
+                     ('message', 'data.message'),
+                     )
+
+def _make_fill_proto():
+    """Returns function that stores `LogMessage` into `LOG_PROTO` message, compiled
+    with all field assignments unrolled.
+    """
+    lines = ["def fill_proto(proto, data):",
+             "    proto.Clear()",
+             "    proto.timestamp.FromDatetime(data.timestamp)"]
+    lines.extend(f"    proto.{field} = {expr}" for field, expr in _LOG_PROTO_FIELDS)
+    lines.extend(["    if data.params:",
+                  "        proto.params.update(data.params)"])
+    ns = {}
+    code = compile('\n'.join(lines), 'fill_proto(LogEntry)', 'exec')
+    eval(code, ns)
+    return ns['fill_proto']
+
 # Classes
 
 class FbLogParserMicro(DataFilterMicro):
@@ -60,19 +86,30 @@ class FbLogParserMicro(DataFilterMicro):
         self.log_context = 'main'
         #
         self.proto = create_message(LOG_PROTO)
+        self._fill_proto = _make_fill_proto()
         self.entry_buf: List[str] = []
         self.parser: LogParser = LogParser()
-        self.input_lefover = None
+        self.input_lefover: str = ''
+        self._output_popleft = self.output.popleft
         #
         if self.input_pipe_mode is SocketMode.CONNECT:
             self.input_protocol.on_init_session = self.handle_init_session
+    def _serialize_entry(self, data: LogMessage) -> bytes:
+        "Returns parsed log entry serialized as `LOG_PROTO` protobuf message."
+        proto = self.proto
+        try:
+            self._fill_proto(proto, data)
+            return proto.SerializeToString()
+        except Exception as exc:
+            raise StopError("Exception", code=ErrorCode.INVALID_DATA) from exc
     def handle_init_session(self, channel: Channel, session: FBDPSession) -> None:
         """Event executed from `send_open()` to set additional information to newly
         created session instance.
         """
         # cache attributes
-        session.charset = cast(MIME, session.data_format).params.get('charset', 'ascii')
-        session.errors = cast(MIME, session.data_format).params.get('errors', 'strict')
+        params = cast(MIME, session.data_format).params
+        session.charset = params.get('charset', 'ascii')
+        session.errors = params.get('errors', 'strict')
     def handle_input_accept_client(self, channel: Channel, session: FBDPSession) -> None:
         """Event handler executed when client connects to INPUT data pipe via OPEN message.
 
@@ -87,16 +124,17 @@ class FbLogParserMicro(DataFilterMicro):
         attribute containing the `ErrorCode` to be returned in CLOSE message.
         """
         super().handle_input_accept_client(channel, session)
-        if cast(MIME, session.data_format).mime_type != MIME_TYPE_TEXT:
-            raise StopError(f"MIME type '{cast(MIME, session.data_format).mime_type}' is not a valid input format",
+        fmt = cast(MIME, session.data_format)
+        params = fmt.params
+        if fmt.mime_type != MIME_TYPE_TEXT:
+            raise StopError(f"MIME type '{fmt.mime_type}' is not a valid input format",
+                            code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
+        if extra := params.keys() - _ALLOWED_INPUT_PARAMS:
+            raise StopError(f"Unknown MIME parameter '{next(iter(extra))}'",
                             code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
-        for param in cast(MIME, session.data_format).params.keys():
-            if param not in ('charset', 'errors'):
-                raise StopError(f"Unknown MIME parameter '{param}'",
-                                code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
         # cache attributes
-        session.charset = cast(MIME, session.data_format).params.get('charset', 'ascii')
-        session.errors = cast(MIME, session.data_format).params.get('errors', 'strict')
+        session.charset = params.get('charset', 'ascii')
+        session.errors = params.get('errors', 'strict')
     def handle_output_accept_client(self, channel: Channel, session: FBDPSession) -> None:
         """Event handler executed when client connects to OUTPUT data pipe via OPEN message.
 
@@ -111,10 +149,11 @@ class FbLogParserMicro(DataFilterMicro):
         attribute containing the `ErrorCode` to be returned in CLOSE message.
         """
         super().handle_output_accept_client(channel, session)
-        if cast(MIME, session.data_format).mime_type != MIME_TYPE_PROTO:
-            raise StopError(f"MIME type '{cast(MIME, session.data_format).mime_type}' is not a valid output format",
+        fmt = cast(MIME, session.data_format)
+        if fmt.mime_type != MIME_TYPE_PROTO:
+            raise StopError(f"MIME type '{fmt.mime_type}' is not a valid output format",
                             code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
-        if (_type := cast(MIME, session.data_format).params['type']) != LOG_PROTO:
+        if (_type := fmt.params['type']) != LOG_PROTO:
             raise StopError(f"Unsupported protobuf type '{_type}'",
                             code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
     def handle_output_produce_data(self, channel: Channel, session: FBDPSession, msg: FBDPMessage) -> None:
@@ -142,20 +181,8 @@ class FbLogParserMicro(DataFilterMicro):
         """
         if not self.output:
             raise StopError("EOF", code=ErrorCode.OK)
-        data: LogMessage = self.output.popleft()
-        try:
-            self.proto.Clear()
-            self.proto.origin = data.origin
-            self.proto.timestamp.FromDatetime(data.timestamp)
-            self.proto.level = data.level.value
-            self.proto.code = data.code
-            self.proto.facility = data.facility.value
-            self.proto.message = data.message
-            for key, value in data.params.items():
-                self.proto.params[key] = value
-            msg.data_frame = self.proto.SerializeToString()
-        except Exception as exc:
-            raise StopError("Exception", code=ErrorCode.INVALID_DATA) from exc
+        # Output queue contains already serialized log entries
+        msg.data_frame = self._output_popleft()
     def handle_input_accept_data(self, channel: Channel, session: FBDPSession, data: bytes) -> None:
         """Event handler executed to process data received in DATA message.
 
@@ -182,16 +209,14 @@ class FbLogParserMicro(DataFilterMicro):
             block: str = data.decode(encoding=session.charset, errors=session.errors)
         except UnicodeError as exc:
             raise StopError("UnicodeError", code=ErrorCode.INVALID_DATA) from exc
-        if self.input_lefover is not None:
-            block = self.input_lefover + block
-            self.input_lefover = None
-        lines = block.splitlines()
-        if block[-1] != '\n':
-            self.input_lefover = lines.pop()
+        # Last item is the incomplete trailing line, or '' when block ends with newline
+        lines = (self.input_lefover + block).split('\n')
+        self.input_lefover = lines.pop()
         batch = []
+        serialize = self._serialize_entry
         for line in lines:
             if (entry := self.parser.push(line)) is not None:
-                batch.append(entry)
+                batch.append(serialize(entry))
         if batch:
             self.store_batch_output(batch)
     def finish_input_processing(self, channel: Channel, session: FBDPSession, code: ErrorCode) -> None:
@@ -212,4 +237,4 @@ class FbLogParserMicro(DataFilterMicro):
             The default implementation does nothing.
         """
         if (entry := self.parser.push(STOP)) is not None:
-            self.store_output(entry)
+            self.store_output(self._serialize_entry(entry))
@@ -40,7 +40,8 @@ from input data pipe, and sends parsed Firebird trace entries into output data p
 """
 
 from __future__ import annotations
-from typing import List, cast
+from datetime import datetime
+from typing import List, Dict, Tuple, NamedTuple, Callable, cast
 from firebird.base.types import STOP
 from firebird.base.protobuf import create_message
 from firebird.lib.trace import TraceParser, AttachmentInfo, TransactionInfo, ServiceInfo, \
@@ -52,17 +53,223 @@ from firebird.lib.trace import TraceParser, AttachmentInfo, TransactionInfo, Ser
      EventServiceAttach, EventServiceDetach, EventServiceStart, EventServiceQuery, \
      EventSetContext, EventError, EventWarning, EventServiceError, EventServiceWarning, \
      EventSweepStart, EventSweepProgress, EventSweepFinish, EventSweepFailed, \
-     EventBLRCompile, EventBLRExecute, EventDYNExecute, EventUnknown, Status, AccessStats
+     EventBLRCompile, EventBLRExecute, EventDYNExecute, EventUnknown, Status, AccessStats, \
+     TraceInfo, TraceEvent
 from saturnin.base import StopError, MIME, MIME_TYPE_TEXT, MIME_TYPE_PROTO, Channel, SocketMode
 from saturnin.lib.data.filter import DataFilterMicro, ErrorCode, FBDPSession, FBDPMessage
 from .api import FbTraceParserConfig, TRACE_PROTO
 
+#: MIME parameters accepted for input pipe format
+_ALLOWED_INPUT_PARAMS = frozenset(('charset', 'errors'))
+
+#: Start of UNIX epoch for trace timestamps (naive, UTC)
+_EPOCH = datetime(1970, 1, 1)
+
+#: SQL parameter types stored as `str()` of their value
+_NUMERIC_PARAM_TYPES = frozenset(('smallint', 'integer', 'bigint', 'float', 'double precision'))
+
+class _StoreSpec(NamedTuple):
+    """Specification of generated `store_*` handler.
+
+    Items in `fields` and `repeated` are `TraceEntry` member field names, optionally
+    followed by `=` and name of the source attribute when it differs. The `status`
+    field is always mapped via `STATUS_IDX`.
+    """
+    #: Name of `TraceEntry` member that receives the data
+    member: str
+    #: Scalar fields
+    fields: Tuple[str, ...]
+    #: Repeated scalar fields
+    repeated: Tuple[str, ...] = ()
+    #: Store table access statistics
+    access: bool = False
+    #: Store common event data
+    event: bool = True
+
+_ATT_FIELDS = ('database', 'charset', 'protocol', 'address', 'user', 'role', 'remote_process',
+               'remote_pid')
+_PERF_FIELDS = ('run_time', 'reads', 'writes', 'fetches', 'marks')
+_TRA_FIELDS = ('status', 'att_id=attachment_id', 'tra_id=transaction_id')
+_STM_FIELDS = ('att_id=attachment_id', 'tra_id=transaction_id', 'stm_id=statement_id', 'sql_id')
+_FREE_FIELDS = ('att_id=attachment_id', 'stm_id=statement_id', 'sql_id')
+_TRG_FIELDS = ('status', 'att_id=attachment_id', 'tra_id=transaction_id', 'trigger', 'table',
+               't_event=event')
+_PROC_FIELDS = ('status', 'att_id=attachment_id', 'tra_id=transaction_id', 'procedure', 'param_id')
+_SWP_FIELDS = ('att_id=attachment_id', 'oit', 'oat', 'ost', 'next')
+
+#: Specifications of generated `store_*` handlers
+_STORE_SPECS: Dict[str, _StoreSpec] = {
+    'store_att_info': _StoreSpec('att_info', ('id=attachment_id', *_ATT_FIELDS), event=False),
+    'store_tra_info': _StoreSpec('tra_info', ('id=transaction_id', 'att_id=attachment_id'),
+                                 ('options', ), event=False),
+    'store_svc_info': _StoreSpec('svc_info', ('id=service_id', 'user', 'protocol', 'address',
+                                              'remote_process', 'remote_pid'), event=False),
+    'store_sql_info': _StoreSpec('sql_info', ('id=sql_id', 'sql', 'plan'), event=False),
+    'store_trace_init': _StoreSpec('trace_init', ('session=session_name', )),
+    'store_trace_suspend': _StoreSpec('trace_suspend', ('session=session_name', )),
+    'store_trace_finish': _StoreSpec('trace_finish', ('session=session_name', )),
+    'store_db_create': _StoreSpec('db_create', ('status', 'att_id=attachment_id', *_ATT_FIELDS)),
+    'store_db_drop': _StoreSpec('db_drop', ('status', 'att_id=attachment_id', *_ATT_FIELDS)),
+    'store_db_attach': _StoreSpec('db_attach', ('status', 'att_id=attachment_id', *_ATT_FIELDS)),
+    'store_db_detach': _StoreSpec('db_detach', ('status', 'att_id=attachment_id', *_ATT_FIELDS)),
+    'store_tra_start': _StoreSpec('tra_start', _TRA_FIELDS, ('options', )),
+    'store_commit': _StoreSpec('tra_commit', (*_TRA_FIELDS, *_PERF_FIELDS), ('options', )),
+    'store_rollback': _StoreSpec('tra_rollback', (*_TRA_FIELDS, *_PERF_FIELDS), ('options', )),
+    'store_commit_retain': _StoreSpec('tra_commit_retain', (*_TRA_FIELDS, *_PERF_FIELDS),
+                                      ('options', )),
+    'store_rollback_retain': _StoreSpec('tra_rollback_retain', (*_TRA_FIELDS, *_PERF_FIELDS),
+                                        ('options', )),
+    'store_stm_prepare': _StoreSpec('stm_prepare', ('status', *_STM_FIELDS, 'prepare=prepare_time')),
+    'store_stm_start': _StoreSpec('stm_start', ('status', *_STM_FIELDS, 'param_id')),
+    'store_smt_finish': _StoreSpec('stm_finish', ('status', *_STM_FIELDS, 'param_id', 'records',
+                                                  *_PERF_FIELDS), access=True),
+    'store_stm_free': _StoreSpec('stm_free', _FREE_FIELDS),
+    'store_cursor_close': _StoreSpec('cursor_close', _FREE_FIELDS),
+    'store_trigger_start': _StoreSpec('trigger_start', _TRG_FIELDS),
+    'store_trigger_finish': _StoreSpec('trigger_finish', (*_TRG_FIELDS, *_PERF_FIELDS), access=True),
+    'store_proc_start': _StoreSpec('proc_start', _PROC_FIELDS),
+    'store_proc_finish': _StoreSpec('proc_finish', (*_PROC_FIELDS, *_PERF_FIELDS), access=True),
+    'store_svc_attach': _StoreSpec('svc_attach', ('status', 'svc_id=service_id')),
+    'store_svc_detach': _StoreSpec('svc_detach', ('status', 'svc_id=service_id')),
+    'store_svc_start': _StoreSpec('svc_start', ('status', 'svc_id=service_id', 'action'),
+                                  ('params=parameters', )),
+    'store_svc_query': _StoreSpec('svc_query', ('status', 'svc_id=service_id', 'action'),
+                                  ('params=sent', )),
+    'store_ctx_set': _StoreSpec('ctx_set', ('att_id=attachment_id', 'tra_id=transaction_id',
+                                            'context', 'key', 'value')),
+    'store_error': _StoreSpec('error', ('att_id=attachment_id', 'place'), ('details', )),
+    'store_warning': _StoreSpec('warning', ('att_id=attachment_id', 'place'), ('details', )),
+    'store_svc_error': _StoreSpec('svc_error', ('svc_id=service_id', 'place'), ('details', )),
+    'store_svc_warning': _StoreSpec('svc_warning', ('svc_id=service_id', 'place'), ('details', )),
+    'store_swp_start': _StoreSpec('swp_start', _SWP_FIELDS),
+    'store_swp_progress': _StoreSpec('swp_progress', ('att_id=attachment_id', *_PERF_FIELDS),
+                                     access=True),
+    'store_swp_finish': _StoreSpec('swp_finish', (*_SWP_FIELDS, *_PERF_FIELDS)),
+    'store_swp_fail': _StoreSpec('swp_fail', ('att_id=attachment_id', )),
+    'store_blr_compile': _StoreSpec('blr_compile', ('status', 'att_id=attachment_id',
+                                                    'stm_id=statement_id', 'content',
+                                                    'prepare=prepare_time')),
+    'store_blr_exec': _StoreSpec('blr_exec', ('status', 'att_id=attachment_id',
+                                              'tra_id=transaction_id', 'stm_id=statement_id',
+                                              'content', *_PERF_FIELDS), access=True),
+    'store_dyn_exec': _StoreSpec('dyn_exec', ('status', 'att_id=attachment_id',
+                                              'tra_id=transaction_id', 'content', 'run_time')),
+    'store_unknown': _StoreSpec('unknown', ('data', )),
+    }
+
+#: Code that stores common event data into `p` submessage. It's used as body of
+#: `store_event()` and inlined into generated `store_*` handlers.
+#:
+#: It's the same as Timestamp.FromDatetime() for naive datetime, but without its
+#: overhead. Related entries often share the timestamp object, so the last conversion
+#: is reused.
+_STORE_EVENT_CODE = """\
+    event = p.event
+    event.id = data.event_id
+    timestamp = data.timestamp
+    last, seconds, nanos = self._last_timestamp
+    if timestamp is not last:
+        delta = timestamp - _EPOCH
+        seconds = delta.days * 86400 + delta.seconds
+        nanos = delta.microseconds * 1000
+        self._last_timestamp = (timestamp, seconds, nanos)
+    ts = event.timestamp
+    ts.seconds = seconds
+    ts.nanos = nanos"""
+
+def _compile_handler(name: str, source: str, filename: str) -> Callable:
+    """Returns function `name` compiled from `source`.
+    """
+    ns = {'_EPOCH': _EPOCH}
+    code = compile(source, filename, 'exec')
+    eval(code, ns)
+    return ns[name]
+
+def _make_store_handler(name: str, spec: _StoreSpec) -> Callable:
+    """Returns `store_*` handler method compiled from specification.
+    """
+    values = []
+    for item in spec.fields:
+        field, _, attr = item.partition('=')
+        attr = attr or field
+        values.append(f"{field}=self.STATUS_IDX[data.{attr}]" if field == 'status'
+                      else f"{field}=data.{attr}")
+    for item in spec.repeated:
+        field, _, attr = item.partition('=')
+        values.append(f"{field}=data.{attr or field}")
+    lines = [f"def {name}(self, data):",
+             f"    p = self.proto.{spec.member}",
+             f"    p.CopyFrom(type(p)({', '.join(values)}))"]
+    if spec.access:
+        lines.append("    self.store_access(p, data.access)")
+    if spec.event:
+        lines.append(_STORE_EVENT_CODE)
+    return _compile_handler(name, '\n'.join(lines), f"{name}({spec.member})")
+
+def _generate_store_handlers(cls):
+    """Class decorator that adds `store_*` handlers defined in `_STORE_SPECS`.
+    """
+    handlers = {name: _make_store_handler(name, spec) for name, spec in _STORE_SPECS.items()}
+    handlers['store_event'] = _compile_handler('store_event',
+                                               f"def store_event(self, p, data):\n{_STORE_EVENT_CODE}",
+                                               'store_event()')
+    for name, handler in handlers.items():
+        handler.__qualname__ = f'{cls.__name__}.{name}'
+        setattr(cls, name, handler)
+    return cls
+
 # Classes
 
+@_generate_store_handlers
 class FbTraceParserMicro(DataFilterMicro):
     """Implementation of Firebird trace parser microservice.
     """
     STATUS_MAP = [Status.UNKNOWN, Status.OK, Status.FAILED, Status.UNAUTHORIZED]
+    STATUS_IDX = {status: i for i, status in enumerate(STATUS_MAP)}
+    #: Names of `store_*` handlers for parsed trace entry types
+    STORE_MAP: Dict[type, str] = {AttachmentInfo: 'store_att_info',
+                                  TransactionInfo: 'store_tra_info',
+                                  ServiceInfo: 'store_svc_info',
+                                  SQLInfo: 'store_sql_info',
+                                  ParamSet: 'store_param_set',
+                                  EventTraceInit: 'store_trace_init',
+                                  EventTraceSuspend: 'store_trace_suspend',
+                                  EventTraceFinish: 'store_trace_finish',
+                                  EventCreate: 'store_db_create',
+                                  EventDrop: 'store_db_drop',
+                                  EventAttach: 'store_db_attach',
+                                  EventDetach: 'store_db_detach',
+                                  EventTransactionStart: 'store_tra_start',
+                                  EventCommit: 'store_commit',
+                                  EventRollback: 'store_rollback',
+                                  EventCommitRetaining: 'store_commit_retain',
+                                  EventRollbackRetaining: 'store_rollback_retain',
+                                  EventPrepareStatement: 'store_stm_prepare',
+                                  EventStatementStart: 'store_stm_start',
+                                  EventStatementFinish: 'store_smt_finish',
+                                  EventFreeStatement: 'store_stm_free',
+                                  EventCloseCursor: 'store_cursor_close',
+                                  EventTriggerStart: 'store_trigger_start',
+                                  EventTriggerFinish: 'store_trigger_finish',
+                                  EventProcedureStart: 'store_proc_start',
+                                  EventProcedureFinish: 'store_proc_finish',
+                                  EventServiceAttach: 'store_svc_attach',
+                                  EventServiceDetach: 'store_svc_detach',
+                                  EventServiceStart: 'store_svc_start',
+                                  EventServiceQuery: 'store_svc_query',
+                                  EventSetContext: 'store_ctx_set',
+                                  EventError: 'store_error',
+                                  EventWarning: 'store_warning',
+                                  EventServiceError: 'store_svc_error',
+                                  EventServiceWarning: 'store_svc_warning',
+                                  EventSweepStart: 'store_swp_start',
+                                  EventSweepProgress: 'store_swp_progress',
+                                  EventSweepFinish: 'store_swp_finish',
+                                  EventSweepFailed: 'store_swp_fail',
+                                  EventBLRCompile: 'store_blr_compile',
+                                  EventBLRExecute: 'store_blr_exec',
+                                  EventDYNExecute: 'store_dyn_exec',
+                                  EventUnknown: 'store_unknown'}
     def initialize(self, config: FbTraceParserConfig) -> None:
         """Verify configuration and assemble component structural parts.
         """
@@ -70,420 +277,68 @@ class FbTraceParserMicro(DataFilterMicro):
         self.log_context = 'main'
         #
         self.proto = create_message(TRACE_PROTO)
-        self.entry_buf: List[str] = []
+        self.access_stats = type(create_message('saturnin.core.protobuf.fbtrace.AccessStats'))
         self.parser: TraceParser = TraceParser()
-        self.input_lefover = None
+        #: Received input data after last complete line
+        self.input_tail: bytearray = bytearray()
+        self._last_timestamp: Tuple[datetime, int, int] = (None, 0, 0)
         #
-        self.data_map: Dict = {AttachmentInfo: self.store_att_info,
-                               TransactionInfo: self.store_tra_info,
-                               ServiceInfo: self.store_svc_info,
-                               SQLInfo: self.store_sql_info,
-                               ParamSet: self.store_param_set,
-                               EventTraceInit: self.store_trace_init,
-                               EventTraceSuspend: self.store_trace_suspend,
-                               EventTraceFinish: self.store_trace_finish,
-                               EventCreate: self.store_db_create,
-                               EventDrop: self.store_db_drop,
-                               EventAttach: self.store_db_attach,
-                               EventDetach: self.store_db_detach,
-                               EventTransactionStart: self.store_tra_start,
-                               EventCommit: self.store_commit,
-                               EventRollback: self.store_rollback,
-                               EventCommitRetaining: self.store_commit_retain,
-                               EventRollbackRetaining: self.store_rollback_retain,
-                               EventPrepareStatement: self.store_stm_prepare,
-                               EventStatementStart: self.store_stm_start,
-                               EventStatementFinish: self.store_smt_finish,
-                               EventFreeStatement: self.store_stm_free,
-                               EventCloseCursor: self.store_cursor_close,
-                               EventTriggerStart: self.store_trigger_start,
-                               EventTriggerFinish: self.store_trigger_finish,
-                               EventProcedureStart: self.store_proc_start,
-                               EventProcedureFinish: self.store_proc_finish,
-                               EventServiceAttach: self.store_svc_attach,
-                               EventServiceDetach: self.store_svc_detach,
-                               EventServiceStart: self.store_svc_start,
-                               EventServiceQuery: self.store_svc_query,
-                               EventSetContext: self.store_ctx_set,
-                               EventError: self.store_error,
-                               EventWarning: self.store_warning,
-                               EventServiceError: self.store_svc_error,
-                               EventServiceWarning: self.store_svc_warning,
-                               EventSweepStart: self.store_swp_start,
-                               EventSweepProgress: self.store_swp_progress,
-                               EventSweepFinish: self.store_swp_finish,
-                               EventSweepFailed: self.store_swp_fail,
-                               EventBLRCompile: self.store_blr_compile,
-                               EventBLRExecute: self.store_blr_exec,
-                               EventDYNExecute: self.store_dyn_exec,
-                               EventUnknown: self.store_unknown}
+        self.data_map: Dict[type, Callable] = {kind: getattr(self, name) for kind, name
+                                               in self.STORE_MAP.items()}
+        self._get_store = self.data_map.get
+        self._output_popleft = self.output.popleft
         #
         if self.input_pipe_mode is SocketMode.CONNECT:
             self.input_protocol.on_init_session = self.handle_init_session
-    def store_att_info(self, data: AttachmentInfo) -> None:
-        self.proto.att_info.id = data.attachment_id
-        self.proto.att_info.database = data.database
-        self.proto.att_info.charset = data.charset
-        self.proto.att_info.protocol = data.protocol
-        self.proto.att_info.address = data.address
-        self.proto.att_info.user = data.user
-        self.proto.att_info.role = data.role
-        self.proto.att_info.remote_process = data.remote_process
-        self.proto.att_info.remote_pid = data.remote_pid
-    def store_tra_info(self, data: TransactionInfo) -> None:
-        self.proto.tra_info.id = data.transaction_id
-        self.proto.tra_info.att_id = data.attachment_id
-        self.proto.tra_info.options.extend(data.options)
-    def store_svc_info(self, data: ServiceInfo) -> None:
-        self.proto.svc_info.id = data.service_id
-        self.proto.svc_info.user = data.user
-        self.proto.svc_info.protocol = data.protocol
-        self.proto.svc_info.address = data.address
-        self.proto.svc_info.remote_process = data.remote_process
-        self.proto.svc_info.remote_pid = data.remote_pid
-    def store_sql_info(self, data: SQLInfo) -> None:
-        self.proto.sql_info.id = data.sql_id
-        self.proto.sql_info.sql = data.sql
-        self.proto.sql_info.plan = data.plan
+    def _serialize_entry(self, data: TraceInfo | TraceEvent) -> bytes:
+        "Returns parsed trace entry serialized as `TRACE_PROTO` protobuf message."
+        try:
+            # TraceEntry holds only the 'entry' oneof, so it's enough to clear the member set last
+            if (last := self.proto.WhichOneof('entry')) is not None:
+                self.proto.ClearField(last)
+            # Statement events dominate typical traces, so they bypass the dispatch table
+            if (kind := type(data)) is EventStatementFinish:
+                self.store_smt_finish(data)
+            elif kind is EventStatementStart:
+                self.store_stm_start(data)
+            elif kind is EventPrepareStatement:
+                self.store_stm_prepare(data)
+            else:
+                self._get_store(kind, self.store_unknown)(data)
+            return self.proto.SerializeToString()
+        except Exception as exc:
+            raise StopError("Exception", code=ErrorCode.INVALID_DATA) from exc
     def store_param_set(self, data: ParamSet) -> None:
-        self.proto.params.id = data.par_id
+        params = []
         for p_type, p_value in data.params:
-            param = self.proto.params.params.add()
-            param.type = p_type
             if p_value is None:
                 p_value = '<NULL>'
-            elif p_type in ('smallint', 'integer', 'bigint', 'float', 'double precision'):
+            elif p_type in _NUMERIC_PARAM_TYPES:
                 p_value = str(p_value)
             elif p_type == 'timestamp':
-                p_value = p_value.strftime('%Y-%m-%dT%H:%M:%S.%f')
+                p_value = p_value.isoformat(timespec='microseconds')
             elif p_type == 'date':
+                # Parser returns dates and times as datetime
                 p_value = p_value.strftime('%Y-%m-%d')
             elif p_type == 'time':
                 p_value = p_value.strftime('%H:%M:%S.%f')
-            param.value = p_value
-    def store_event(self, proto, data: EventTraceInit) -> None:
-        proto.event.id = data.event_id
-        proto.event.timestamp.FromDatetime(data.timestamp)
+            params.append({'type': p_type, 'value': p_value})
+        p = self.proto.params
+        p.CopyFrom(type(p)(id=data.par_id, param=params))
     def store_access(self, proto, data: List[AccessStats]) -> None:
-        for acc in data:
-            p = proto.access.add()
-            p.table = acc.table
-            p.natural = acc.natural
-            p.index = acc.index
-            p.update = acc.update
-            p.insert = acc.insert
-            p.delete = acc.delete
-            p.backout = acc.backout
-            p.purge = acc.purge
-            p.expunge = acc.expunge
-    def store_trace_init(self, data: EventTraceInit) -> None:
-        self.proto.trace_init.session = data.session_name
-        self.store_event(self.proto.trace_init, data)
-    def store_trace_suspend(self, data: EventTraceSuspend) -> None:
-        self.proto.trace_suspend.session = data.session_name
-        self.store_event(self.proto.trace_suspend, data)
-    def store_trace_finish(self, data: EventTraceFinish) -> None:
-        self.proto.trace_finish.session = data.session_name
-        self.store_event(self.proto.trace_finish, data)
-    def store_db_create(self, data: EventCreate) -> None:
-        self.proto.db_create.status = self.STATUS_MAP.index(data.status)
-        self.proto.db_create.att_id = data.attachment_id
-        self.proto.db_create.database = data.database
-        self.proto.db_create.charset = data.charset
-        self.proto.db_create.protocol = data.protocol
-        self.proto.db_create.address = data.address
-        self.proto.db_create.user = data.user
-        self.proto.db_create.role = data.role
-        self.proto.db_create.remote_process = data.remote_process
-        self.proto.db_create.remote_pid = data.remote_pid
-        self.store_event(self.proto.db_create, data)
-    def store_db_drop(self, data: EventDrop) -> None:
-        self.proto.db_drop.status = self.STATUS_MAP.index(data.status)
-        self.proto.db_drop.att_id = data.attachment_id
-        self.proto.db_drop.database = data.database
-        self.proto.db_drop.charset = data.charset
-        self.proto.db_drop.protocol = data.protocol
-        self.proto.db_drop.address = data.address
-        self.proto.db_drop.user = data.user
-        self.proto.db_drop.role = data.role
-        self.proto.db_drop.remote_process = data.remote_process
-        self.proto.db_drop.remote_pid = data.remote_pid
-        self.store_event(self.proto.db_drop, data)
-    def store_db_attach(self, data: EventAttach) -> None:
-        self.proto.db_attach.status = self.STATUS_MAP.index(data.status)
-        self.proto.db_attach.att_id = data.attachment_id
-        self.proto.db_attach.database = data.database
-        self.proto.db_attach.charset = data.charset
-        self.proto.db_attach.protocol = data.protocol
-        self.proto.db_attach.address = data.address
-        self.proto.db_attach.user = data.user
-        self.proto.db_attach.role = data.role
-        self.proto.db_attach.remote_process = data.remote_process
-        self.proto.db_attach.remote_pid = data.remote_pid
-        self.store_event(self.proto.db_attach, data)
-    def store_db_detach(self, data: EventDetach) -> None:
-        self.proto.db_detach.status = self.STATUS_MAP.index(data.status)
-        self.proto.db_detach.att_id = data.attachment_id
-        self.proto.db_detach.database = data.database
-        self.proto.db_detach.charset = data.charset
-        self.proto.db_detach.protocol = data.protocol
-        self.proto.db_detach.address = data.address
-        self.proto.db_detach.user = data.user
-        self.proto.db_detach.role = data.role
-        self.proto.db_detach.remote_process = data.remote_process
-        self.proto.db_detach.remote_pid = data.remote_pid
-        self.store_event(self.proto.db_detach, data)
-    def store_tra_start(self, data: EventTransactionStart) -> None:
-        self.proto.tra_start.status = self.STATUS_MAP.index(data.status)
-        self.proto.tra_start.att_id = data.attachment_id
-        self.proto.tra_start.tra_id = data.transaction_id
-        self.proto.tra_start.options.extend(data.options)
-        self.store_event(self.proto.tra_start, data)
-    def store_commit(self, data: EventCommit) -> None:
-        self.proto.tra_commit.status = self.STATUS_MAP.index(data.status)
-        self.proto.tra_commit.att_id = data.attachment_id
-        self.proto.tra_commit.tra_id = data.transaction_id
-        self.proto.tra_commit.options.extend(data.options)
-        self.proto.tra_commit.run_time = data.run_time
-        self.proto.tra_commit.reads = data.reads
-        self.proto.tra_commit.writes = data.writes
-        self.proto.tra_commit.fetches = data.fetches
-        self.proto.tra_commit.marks = data.marks
-        self.store_event(self.proto.tra_commit, data)
-    def store_rollback(self, data: EventRollback) -> None:
-        self.proto.tra_rollback.status = self.STATUS_MAP.index(data.status)
-        self.proto.tra_rollback.att_id = data.attachment_id
-        self.proto.tra_rollback.tra_id = data.transaction_id
-        self.proto.tra_rollback.options.extend(data.options)
-        self.proto.tra_rollback.run_time = data.run_time
-        self.proto.tra_rollback.reads = data.reads
-        self.proto.tra_rollback.writes = data.writes
-        self.proto.tra_rollback.fetches = data.fetches
-        self.proto.tra_rollback.marks = data.marks
-        self.store_event(self.proto.tra_rollback, data)
-    def store_commit_retain(self, data: EventCommitRetaining) -> None:
-        self.store_event(data)
-        self.proto.tra_commit_retain.status = self.STATUS_MAP.index(data.status)
-        self.proto.tra_commit_retain.att_id = data.attachment_id
-        self.proto.tra_commit_retain.tra_id = data.transaction_id
-        self.proto.tra_commit_retain.options.extend(data.options)
-        self.proto.tra_commit_retain.run_time = data.run_time
-        self.proto.tra_commit_retain.reads = data.reads
-        self.proto.tra_commit_retain.writes = data.writes
-        self.proto.tra_commit_retain.fetches = data.fetches
-        self.proto.tra_commit_retain.marks = data.marks
-    def store_rollback_retain(self, data: EventRollbackRetaining) -> None:
-        self.proto.tra_rollback_retain.status = self.STATUS_MAP.index(data.status)
-        self.proto.tra_rollback_retain.att_id = data.attachment_id
-        self.proto.tra_rollback_retain.tra_id = data.transaction_id
-        self.proto.tra_rollback_retain.options.extend(data.options)
-        self.proto.tra_rollback_retain.run_time = data.run_time
-        self.proto.tra_rollback_retain.reads = data.reads
-        self.proto.tra_rollback_retain.writes = data.writes
-        self.proto.tra_rollback_retain.fetches = data.fetches
-        self.proto.tra_rollback_retain.marks = data.marks
-        self.store_event(self.proto.tra_rollback_retain, data)
-    def store_stm_prepare(self, data: EventPrepareStatement) -> None:
-        self.proto.stm_prepare.status = self.STATUS_MAP.index(data.status)
-        self.proto.stm_prepare.att_id = data.attachment_id
-        self.proto.stm_prepare.tra_id = data.transaction_id
-        self.proto.stm_prepare.stm_id = data.statement_id
-        self.proto.stm_prepare.sql_id = data.sql_id
-        self.proto.stm_prepare.prepare = data.prepare_time
-        self.store_event(self.proto.stm_prepare, data)
-    def store_stm_start(self, data: EventStatementStart) -> None:
-        self.proto.stm_start.status = self.STATUS_MAP.index(data.status)
-        self.proto.stm_start.att_id = data.attachment_id
-        self.proto.stm_start.tra_id = data.transaction_id
-        self.proto.stm_start.stm_id = data.statement_id
-        self.proto.stm_start.sql_id = data.sql_id
-        self.proto.stm_start.param_id = data.param_id
-        self.store_event(self.proto.stm_start, data)
-    def store_smt_finish(self, data: EventStatementFinish) -> None:
-        self.proto.stm_finish.status = self.STATUS_MAP.index(data.status)
-        self.proto.stm_finish.att_id = data.attachment_id
-        self.proto.stm_finish.tra_id = data.transaction_id
-        self.proto.stm_finish.stm_id = data.statement_id
-        self.proto.stm_finish.sql_id = data.sql_id
-        self.proto.stm_finish.param_id = data.param_id
-        self.proto.stm_finish.records = data.records
-        self.proto.stm_finish.run_time = data.run_time
-        self.proto.stm_finish.reads = data.reads
-        self.proto.stm_finish.writes = data.writes
-        self.proto.stm_finish.fetches = data.fetches
-        self.proto.stm_finish.marks = data.marks
-        self.store_access(self.proto.stm_finish, data.access)
-        self.store_event(self.proto.stm_finish, data)
-    def store_stm_free(self, data: EventFreeStatement) -> None:
-        self.proto.stm_free.att_id = data.attachment_id
-        self.proto.stm_free.tra_id = data.transaction_id
-        self.proto.stm_free.stm_id = data.statement_id
-        self.proto.stm_free.sql_id = data.sql_id
-        self.store_event(self.proto.stm_free, data)
-    def store_cursor_close(self, data: EventCloseCursor) -> None:
-        self.proto.cursor_close.att_id = data.attachment_id
-        self.proto.cursor_close.tra_id = data.transaction_id
-        self.proto.cursor_close.stm_id = data.statement_id
-        self.proto.cursor_close.sql_id = data.sql_id
-        self.store_event(self.proto.cursor_close, data)
-    def store_trigger_start(self, data: EventTriggerStart) -> None:
-        self.proto.trigger_start.status = self.STATUS_MAP.index(data.status)
-        self.proto.trigger_start.att_id = data.attachment_id
-        self.proto.trigger_start.tra_id = data.transaction_id
-        self.proto.trigger_start.trigger = data.trigger
-        self.proto.trigger_start.table = data.table
-        self.proto.trigger_start.t_event = data.event
-        self.store_event(self.proto.trigger_start, data)
-    def store_trigger_finish(self, data: EventTriggerFinish) -> None:
-        self.proto.trigger_finish.status = self.STATUS_MAP.index(data.status)
-        self.proto.trigger_finish.att_id = data.attachment_id
-        self.proto.trigger_finish.tra_id = data.transaction_id
-        self.proto.trigger_finish.trigger = data.trigger
-        self.proto.trigger_finish.table = data.table
-        self.proto.trigger_finish.t_event = data.event
-        self.proto.trigger_finish.run_time = data.run_time
-        self.proto.trigger_finish.reads = data.reads
-        self.proto.trigger_finish.writes = data.writes
-        self.proto.trigger_finish.fetches = data.fetches
-        self.proto.trigger_finish.marks = data.marks
-        self.store_access(self.proto.trigger_finish, data.access)
-        self.store_event(self.proto.trigger_finish, data)
-    def store_proc_start(self, data: EventProcedureStart) -> None:
-        self.proto.proc_start.status = self.STATUS_MAP.index(data.status)
-        self.proto.proc_start.att_id = data.attachment_id
-        self.proto.proc_start.tra_id = data.transaction_id
-        self.proto.proc_start.procedure = data.procedure
-        self.proto.proc_start.param_id  = data.param_id
-        self.store_event(self.proto.proc_start, data)
-    def store_proc_finish(self, data: EventProcedureFinish) -> None:
-        self.proto.proc_finish.status = self.STATUS_MAP.index(data.status)
-        self.proto.proc_finish.att_id = data.attachment_id
-        self.proto.proc_finish.tra_id = data.transaction_id
-        self.proto.proc_finish.procedure = data.procedure
-        self.proto.proc_finish.param_id  = data.param_id
-        self.proto.proc_finish.run_time = data.run_time
-        self.proto.proc_finish.reads = data.reads
-        self.proto.proc_finish.writes = data.writes
-        self.proto.proc_finish.fetches = data.fetches
-        self.proto.proc_finish.marks = data.marks
-        self.store_access(self.proto.proc_finish, data.access)
-        self.store_event(self.proto.proc_finish, data)
-    def store_svc_attach(self, data: EventServiceAttach) -> None:
-        self.proto.svc_attach.status = self.STATUS_MAP.index(data.status)
-        self.proto.svc_attach.svc_id = data.service_id
-        self.store_event(self.proto.svc_attach, data)
-    def store_svc_detach(self, data: EventServiceDetach) -> None:
-        self.proto.svc_detach.status = self.STATUS_MAP.index(data.status)
-        self.proto.svc_detach.svc_id = data.service_id
-        self.store_event(self.proto.svc_detach, data)
-    def store_svc_start(self, data: EventServiceStart) -> None:
-        self.proto.status = self.STATUS_MAP.index(data.status)
-        self.proto.svc_start.svc_id = data.service_id
-        self.proto.svc_start.action = data.action
-        self.proto.svc_start.params.extend(data.parameters)
-        self.store_event(self.proto.svc_start, data)
-    def store_svc_query(self, data: EventServiceQuery) -> None:
-        self.proto.svc_query.status = self.STATUS_MAP.index(data.status)
-        self.proto.svc_query.svc_id = data.service_id
-        self.proto.svc_query.action = data.action
-        self.proto.svc_query.params.extend(data.parameters)
-        self.store_event(self.proto.svc_query, data)
-    def store_ctx_set(self, data: EventSetContext) -> None:
-        self.proto.ctx_set.att_id = data.attachment_id
-        self.proto.ctx_set.tra_id = data.transaction_id
-        self.proto.ctx_set.context = data.context
-        self.proto.ctx_set.key = data.key
-        self.proto.ctx_set.value = data.value
-        self.store_event(self.proto.ctx_set, data)
-    def store_error(self, data: EventError) -> None:
-        self.proto.error.att_id = data.attachment_id
-        self.proto.error.place = data.place
-        self.proto.error.details.extend(data.details)
-        self.store_event(self.proto.error, data)
-    def store_warning(self, data: EventWarning) -> None:
-        self.proto.warning.att_id = data.attachment_id
-        self.proto.warning.place = data.place
-        self.proto.warning.details.extend(data.details)
-        self.store_event(self.proto.warning, data)
-    def store_svc_error(self, data: EventServiceError) -> None:
-        self.proto.svc_error.svc_id = data.service_id
-        self.proto.svc_error.place = data.place
-        self.proto.svc_error.details.extend(data.details)
-        self.store_event(self.proto.svc_error, data)
-    def store_svc_warning(self, data: EventServiceWarning) -> None:
-        self.proto.svc_warning.svc_id = data.service_id
-        self.proto.svc_warning.place = data.place
-        self.proto.svc_warning.details.extend(data.details)
-        self.store_event(self.proto.svc_warning, data)
-    def store_swp_start(self, data: EventSweepStart) -> None:
-        self.store_event(self.proto.swp_start, data)
-        self.proto.swp_start.att_id = data.attachment_id
-        self.proto.swp_start.oit = data.oit
-        self.proto.swp_start.oat = data.oat
-        self.proto.swp_start.ost = data.ost
-        self.proto.swp_start.next = data.next
-    def store_swp_progress(self, data: EventSweepProgress) -> None:
-        self.proto.swp_progress.att_id = data.attachment_id
-        self.proto.swp_progress.run_time = data.run_time
-        self.proto.swp_progress.reads = data.reads
-        self.proto.swp_progress.writes = data.writes
-        self.proto.swp_progress.fetches = data.fetches
-        self.proto.swp_progress.marks = data.marks
-        self.store_access(self.proto.swp_progress, data.access)
-        self.store_event(self.proto.swp_progress, data)
-    def store_swp_finish(self, data: EventSweepFinish) -> None:
-        self.store_event(self.proto.swp_finish, data)
-        self.proto.swp_finish.att_id = data.attachment_id
-        self.proto.swp_finish.oit = data.oit
-        self.proto.swp_finish.oat = data.oat
-        self.proto.swp_finish.ost = data.ost
-        self.proto.swp_finish.next = data.next
-        self.proto.swp_finish.run_time = data.run_time
-        self.proto.swp_finish.reads = data.reads
-        self.proto.swp_finish.writes = data.writes
-        self.proto.swp_finish.fetches = data.fetches
-        self.proto.swp_finish.marks = data.marks
-        self.store_event(self.proto.swp_finish, data)
-    def store_swp_fail(self, data: EventSweepFailed) -> None:
-        self.proto.swp_fail.att_id = data.attachment_id
-        self.store_event(self.proto.swp_fail, data)
-    def store_blr_compile(self, data: EventBLRCompile) -> None:
-        self.proto.blr_compile.status = self.STATUS_MAP.index(data.status)
-        self.proto.blr_compile.att_id = data.attachment_id
-        self.proto.blr_compile.stm_id = data.statement_id
-        self.proto.blr_compile.content = data.content
-        self.proto.blr_compile.prepare = data.prepare_time
-        self.store_event(self.proto.blr_compile, data)
-    def store_blr_exec(self, data: EventBLRExecute) -> None:
-        self.proto.blr_exec.status = self.STATUS_MAP.index(data.status)
-        self.proto.blr_exec.att_id = data.attachment_id
-        self.proto.blr_exec.tra_id = data.transaction_id
-        self.proto.blr_exec.stm_id = data.statement_id
-        self.proto.blr_exec.content = data.content
-        self.proto.blr_exec.run_time = data.run_time
-        self.proto.blr_exec.reads = data.reads
-        self.proto.blr_exec.writes = data.writes
-        self.proto.blr_exec.fetches = data.fetches
-        self.proto.blr_exec.marks = data.marks
-        self.store_access(self.proto.blr_exec, data.access)
-        self.store_event(self.proto.blr_exec, data)
-    def store_dyn_exec(self, data: EventDYNExecute) -> None:
-        self.proto.dyn_exec.status = self.STATUS_MAP.index(data.status)
-        self.proto.dyn_exec.att_id = data.attachment_id
-        self.proto.dyn_exec.tra_id = data.transaction_id
-        self.proto.dyn_exec.content = data.content
-        self.proto.dyn_exec.run_time = data.run_time
-        self.store_event(self.proto.dyn_exec, data)
-    def store_unknown(self, data: EventUnknown) -> None:
-        self.proto.unknown.data = data.data
-        self.store_event(self.proto.unknown, data)
+        access_stats = self.access_stats
+        proto.access.extend([access_stats(table=acc.table, natural=acc.natural, index=acc.index,
+                                          update=acc.update, insert=acc.insert, delete=acc.delete,
+                                          backout=acc.backout, purge=acc.purge, expunge=acc.expunge)
+                             for acc in data])
     def handle_init_session(self, channel: Channel, session: FBDPSession) -> None:
         """Event executed from `send_open()` to set additional information to newly
         created session instance.
         """
         # cache attributes
-        session.charset = cast(MIME, session.data_format).params.get('charset', 'ascii')
-        session.errors = cast(MIME, session.data_format).params.get('errors', 'strict')
+        params = cast(MIME, session.data_format).params
+        session.charset = params.get('charset', 'ascii')
+        session.errors = params.get('errors', 'strict')
     def handle_input_accept_client(self, channel: Channel, session: FBDPSession) -> None:
         """Event handler executed when client connects to INPUT data pipe via OPEN message.
 
@@ -498,16 +353,17 @@ class FbTraceParserMicro(DataFilterMicro):
         attribute containing the `ErrorCode` to be returned in CLOSE message.
         """
         super().handle_input_accept_client(channel, session)
-        if cast(MIME, session.data_format).mime_type != MIME_TYPE_TEXT:
-            raise StopError(f"MIME type '{cast(MIME, session.data_format).mime_type}' is not a valid input format",
+        fmt = cast(MIME, session.data_format)
+        params = fmt.params
+        if fmt.mime_type != MIME_TYPE_TEXT:
+            raise StopError(f"MIME type '{fmt.mime_type}' is not a valid input format",
+                            code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
+        if extra := params.keys() - _ALLOWED_INPUT_PARAMS:
+            raise StopError(f"Unknown MIME parameter '{next(iter(extra))}'",
                             code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
-        for param in cast(MIME, session.data_format).params.keys():
-            if param not in ('charset', 'errors'):
-                raise StopError(f"Unknown MIME parameter '{param}'",
-                                code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
         # cache attributes
-        session.charset = cast(MIME, session.data_format).params.get('charset', 'ascii')
-        session.errors = cast(MIME, session.data_format).params.get('errors', 'strict')
+        session.charset = params.get('charset', 'ascii')
+        session.errors = params.get('errors', 'strict')
     def handle_output_accept_client(self, channel: Channel, session: FBDPSession) -> None:
         """Event handler executed when client connects to OUTPUT data pipe via OPEN message.
 
@@ -522,10 +378,11 @@ class FbTraceParserMicro(DataFilterMicro):
         attribute containing the `ErrorCode` to be returned in CLOSE message.
         """
         super().handle_output_accept_client(channel, session)
-        if cast(MIME, session.data_format).mime_type != MIME_TYPE_PROTO:
-            raise StopError(f"MIME type '{cast(MIME, session.data_format).mime_type}' is not a valid output format",
+        fmt = cast(MIME, session.data_format)
+        if fmt.mime_type != MIME_TYPE_PROTO:
+            raise StopError(f"MIME type '{fmt.mime_type}' is not a valid output format",
                             code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
-        if (_type := cast(MIME, session.data_format).params['type']) != TRACE_PROTO:
+        if (_type := fmt.params['type']) != TRACE_PROTO:
             raise StopError(f"Unsupported protobuf type '{_type}'",
                             code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
     def handle_output_produce_data(self, channel: Channel, session: FBDPSession, msg: FBDPMessage) -> None:
@@ -553,14 +410,8 @@ class FbTraceParserMicro(DataFilterMicro):
         """
         if not self.output:
             raise StopError("EOF", code=ErrorCode.OK)
-        data = self.output.popleft()
-        try:
-            self.proto.Clear()
-            store = self.data_map[type(data)]
-            store(data)
-            msg.data_frame = self.proto.SerializeToString()
-        except Exception as exc:
-            raise StopError("Exception", code=ErrorCode.INVALID_DATA) from exc
+        # Output queue contains already serialized trace entries
+        msg.data_frame = self._output_popleft()
     def handle_input_accept_data(self, channel: Channel, session: FBDPSession, data: bytes) -> None:
         """Event handler executed to process data received in DATA message.
 
@@ -583,20 +434,26 @@ class FbTraceParserMicro(DataFilterMicro):
         Note:
             The ACK-REQUEST in received DATA message is handled automatically by protocol.
         """
+        tail = self.input_tail
+        tail += data
+        # Only complete lines are decoded, so characters split between DATA messages
+        # are decoded once all their bytes arrive.
+        if (cut := tail.rfind(b'\n') + 1) == 0:
+            return
         try:
-            block: str = data.decode(encoding=session.charset, errors=session.errors)
+            # Decode straight from the buffer, without copying complete lines out of it
+            with memoryview(tail) as view:
+                block: str = str(view[:cut], session.charset, session.errors)
         except UnicodeError as exc:
             raise StopError("UnicodeError", code=ErrorCode.INVALID_DATA) from exc
-        if self.input_lefover is not None:
-            block = self.input_lefover + block
-            self.input_lefover = None
-        lines = block.splitlines()
-        if block[-1] != '\n':
-            self.input_lefover = lines.pop()
+        del tail[:cut]
+        lines = block.split('\n')
+        lines.pop()
         batch = []
+        serialize = self._serialize_entry
         for line in lines:
             if (entry := self.parser.push(line)) is not None:
-                batch.extend(entry)
+                batch.extend(map(serialize, entry))
         if batch:
             self.store_batch_output(batch)
     def finish_input_processing(self, channel: Channel, session: FBDPSession, code: ErrorCode) -> None:
@@ -617,4 +474,4 @@ class FbTraceParserMicro(DataFilterMicro):
             The default implementation does nothing.
         """
         if (entry := self.parser.push(STOP)) is not None:
-            self.store_batch_output(entry)
+            self.store_batch_output(list(map(self._serialize_entry, entry)))
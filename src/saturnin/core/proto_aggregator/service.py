@@ -44,49 +44,67 @@ This microservice is a DATA_FILTER:
 """
 
 from __future__ import annotations
-from typing import List, Dict, Tuple, Any
-from firebird.base.signal import eventsocket
+from typing import List, Dict, Tuple, Any, Callable
 from firebird.base.protobuf import create_message, is_msg_registered
-from saturnin.base import StopError, MIME_TYPE_PROTO, Channel
+from saturnin.base import Error, StopError, MIME_TYPE_PROTO, Channel
 from saturnin.lib.data.filter import DataFilterMicro, ErrorCode, FBDPSession, FBDPMessage
 from .api import ProtoAggregatorConfig, AGGREGATE_FORMAT, AGGREGATE_PROTO
 
+# Functions
+
+def _make_extract(group_by: List[GroupByItem], aggregates: List[AggregateItem]) -> Callable:
+    """Returns function that evaluates all 'group by' and aggregate field specifications
+    for `data` in single call, and returns tuple with 'group by' key and tuple of values
+    for aggregates.
+    """
+    # Specifications are placed on separate lines, so trailing comments in them can't
+    # swallow the rest of the expression
+    key = ''.join(f'{item.spec.strip()}\n, ' for item in group_by)
+    values = ''.join(f'{item.field_spec.strip() or None}\n, ' for item in aggregates)
+    ns = {}
+    try:
+        code = compile(f"def extract(data):\n    return ((\n{key}), (\n{values}))",
+                       'extract', 'exec')
+    except SyntaxError as exc:
+        raise Error("Invalid 'group_by' or 'aggregate' field specification") from exc
+    eval(code, ns)
+    return ns['extract']
+
 # Classes
 
 class GroupByItem:
     """GROUP BY item handler."""
+    __slots__ = ('name', 'spec')
     def __init__(self, spec: str):
         if ':' in spec:
             self.name, self.spec = spec.split(':')
         else:
             self.spec = spec
             self.name = spec
-        ns = {}
-        code = compile(f"def expr(data):\n    return {self.spec}",
-                       f"group_by({self.spec})", 'exec')
-        eval(code, ns)
-        self._func = ns['expr']
-    def get_key(self, data: Any) -> Any:
-        """Returns GROUP BY key value"""
-        return self._func(data)
 
 
 class AggregateItem:
-    """Aggregate item handler."""
+    """Aggregate item handler.
+
+    Single instance computes the aggregate for all groups. State of each group is
+    stored in lists indexed by group ID.
+    """
+    __slots__ = ('__count', '__value', 'spec', 'aggregate_func', 'field_spec', 'name',
+                 'aggregate')
+    #: Method that processes value for group, set according to aggregate function
+    aggregate: Callable[[int, Any], None]
     def __init__(self, spec: str):
-        self.__count: int = 0
-        self.__value: Any = None
+        self.__count: List[int] = []
+        self.__value: List[Any] = []
         self.spec = spec
-        self.aggregate_func, field_spec = spec.split(':', 1)
-        if ' as ' in self.aggregate_func:
-            self.aggregate_func, self.name = self.aggregate_func.split(' as ')
+        self.aggregate_func, self.field_spec = spec.split(':', 1)
+        # Function names and 'as' are case-insensitive, as in config validation
+        if (i := self.aggregate_func.lower().find(' as ')) != -1:
+            self.name = self.aggregate_func[i + 4:]
+            self.aggregate_func = self.aggregate_func[:i]
         else:
             self.name = self.aggregate_func
-        ns = {}
-        code = compile(f"def expr(data):\n    return {field_spec}",
-                       f"{self.aggregate_func}({field_spec})", 'exec')
-        eval(code, ns)
-        self._func = ns['expr']
+        self.aggregate_func = self.aggregate_func.lower()
         #
         if self.aggregate_func == 'count':
             self.aggregate = self.agg_count
@@ -96,46 +114,46 @@ class AggregateItem:
             self.aggregate = self.agg_max
         elif self.aggregate_func in ('sum', 'avg'):
             self.aggregate = self.agg_sum_avg
-    def agg_count(self, data: Any) -> None:
+        else:
+            raise Error(f"Unknown aggregate function '{self.aggregate_func}'")
+    def add_group(self) -> None:
+        """Adds state for new group.
+        """
+        self.__count.append(0)
+        self.__value.append(None)
+    def agg_count(self, gid: int, value: Any) -> None:
         """COUNT aggregate.
         """
-        self.__count += 1
-        self.__value = self.__count
-    def agg_min(self, data: Any) -> None:
+        self.__count[gid] += 1
+    def agg_min(self, gid: int, value: Any) -> None:
         """MIN aggregate.
         """
-        self.__count += 1
-        if self.__value is None:
-            self.__value = self._func(data)
-        else:
-            self.__value = min(self.__value, self._func(data))
-    def agg_max(self, data: Any) -> None:
+        self.__count[gid] += 1
+        if (current := self.__value[gid]) is not None:
+            value = min(current, value)
+        self.__value[gid] = value
+    def agg_max(self, gid: int, value: Any) -> None:
         """MAX aggregate
         """
-        self.__count += 1
-        if self.__value is None:
-            self.__value = self._func(data)
-        else:
-            self.__value = max(self.__value, self._func(data))
-    def agg_sum_avg(self, data: Any) -> None:
+        self.__count[gid] += 1
+        if (current := self.__value[gid]) is not None:
+            value = max(current, value)
+        self.__value[gid] = value
+    def agg_sum_avg(self, gid: int, value: Any) -> None:
         """SUM aggregate
         """
-        self.__count += 1
-        if self.__value is None:
-            self.__value = self._func(data)
-        else:
-            self.__value += self._func(data)
-    def get_result(self) -> Any:
-        """Returns result of the aggregate."""
-        if self.__value is not None and self.aggregate_func == 'avg':
-            return self.__value / self.__count
-        elif self.__value is None and self.aggregate_func == 'count':
-            return 0
-        return self.__value
-    @eventsocket
-    def aggregate(self, data: Any) -> None:
-        """Process value.
-        """
+        self.__count[gid] += 1
+        if (current := self.__value[gid]) is not None:
+            value = current + value
+        self.__value[gid] = value
+    def get_result(self, gid: int) -> Any:
+        """Returns result of the aggregate for group."""
+        if self.aggregate_func == 'count':
+            return self.__count[gid]
+        value = self.__value[gid]
+        if value is not None and self.aggregate_func == 'avg':
+            return value / self.__count[gid]
+        return value
 
 class ProtoAggregatorMicro(DataFilterMicro):
     """Implementation of Data aggregator microservice.
@@ -148,19 +166,52 @@ class ProtoAggregatorMicro(DataFilterMicro):
         #
         self.data: Any = None
         self.group_by: List[GroupByItem] = []
-        self.agg_defs: List[str] = []
-        self.aggregates: Dict[Tuple, AggregateItem] = {}
+        self.aggregates: List[AggregateItem] = []
+        #: Group IDs (indices to aggregate state) for 'group by' keys
+        self.group_ids: Dict[Tuple, int] = {}
         #
         for item in config.group_by.value:
             self.group_by.append(GroupByItem(item))
         for item in config.aggregate.value:
-            self.agg_defs.append(item)
+            self.aggregates.append(AggregateItem(item))
+        self._extract: Callable[[Any], Tuple[Tuple, Tuple]] = _make_extract(self.group_by,
+                                                                            self.aggregates)
         #
         proto_class = config.input_pipe_format.value.params.get('type')
         if not is_msg_registered(proto_class):
             raise StopError(f"Unknown protobuf message type '{proto_class}'",
                             code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
         self.data = create_message(proto_class)
+        self._proto_class: str = self.data.DESCRIPTOR.full_name
+        self._accept_data = self._make_accept_data()
+        # Input protocol calls the specialized handler directly, so it must have the same
+        # signature as `handle_input_accept_data`
+        self.input_protocol.on_accept_data = self._accept_data
+    def _make_accept_data(self) -> Callable[[Channel, FBDPSession, bytes], None]:
+        """Returns DATA message handler with all objects used per row bound as closure
+        variables.
+        """
+        parse_data = self.data.ParseFromString
+        proto = self.data
+        extract = self._extract
+        aggregates = self.aggregates
+        group_ids = self.group_ids
+        get_gid = group_ids.get
+        def accept_data(channel: Channel, session: FBDPSession, data: bytes) -> None:
+            try:
+                parse_data(data)
+            except Exception as exc:
+                raise StopError("Exception", code=ErrorCode.INVALID_DATA) from exc
+            #
+            key, values = extract(proto)
+            if (gid := get_gid(key)) is None:
+                gid = len(group_ids)
+                group_ids[key] = gid
+                for item in aggregates:
+                    item.add_group()
+            for item, value in zip(aggregates, values):
+                item.aggregate(gid, value)
+        return accept_data
     def handle_input_accept_client(self, channel: Channel, session: FBDPSession) -> None:
         """Event handler executed when client connects to INPUT data pipe via OPEN message.
 
@@ -179,7 +230,7 @@ class ProtoAggregatorMicro(DataFilterMicro):
             raise StopError(f"MIME type '{session.data_format}' is not a valid input format",
                             code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
         proto_class = session.data_format.params.get('type')
-        if self.data.DESCRIPTOR.full_name != proto_class:
+        if self._proto_class != proto_class:
             raise StopError(f"Protobuf message type '{proto_class}' not allowed",
                             code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
     def handle_output_accept_client(self, channel: Channel, session: FBDPSession) -> None:
@@ -211,15 +262,13 @@ class ProtoAggregatorMicro(DataFilterMicro):
             code:    Input pipe closing ErrorCode.
         """
         output_data = create_message(AGGREGATE_PROTO)
+        group_names = [grp.name for grp in self.group_by]
         batch = []
-        for key, items in self.aggregates.items():
+        for key, gid in self.group_ids.items():
+            row = dict(zip(group_names, key))
+            row.update((item.name, item.get_result(gid)) for item in self.aggregates)
             output_data.Clear()
-            i = 0
-            for grp in self.group_by:
-                output_data.data[grp.name] = key[i]
-                i += 1
-            for item in items:
-                output_data.data[item.name] = item.get_result()
+            output_data.data.update(row)
             batch.append(output_data.SerializeToString())
         self.store_batch_output(batch)
     def handle_output_produce_data(self, channel: Channel, session: FBDPSession, msg: FBDPMessage) -> None:
@@ -270,15 +319,4 @@ class ProtoAggregatorMicro(DataFilterMicro):
         Note:
             The ACK-REQUEST in received DATA message is handled automatically by protocol.
         """
-        try:
-            self.data.ParseFromString(data)
-        except Exception as exc:
-            raise StopError("Exception", code=ErrorCode.INVALID_DATA) from exc
-        #
-        key = tuple(item.get_key(self.data) for item in self.group_by)
-        agg = self.aggregates.get(key)
-        if agg is None:
-            agg = [AggregateItem(spec) for spec in self.agg_defs]
-            self.aggregates[key] = agg
-        for item in agg:
-            item.aggregate(self.data)
+        self._accept_data(channel, session, data)
@@ -45,6 +45,8 @@ This microservice is a DATA_FILTER:
 
 from __future__ import annotations
 import uuid
+import datetime
+from typing import Any, Callable
 from functools import partial
 from firebird.base.config import PyCallableOption, PyExprOption
 from saturnin.base import (create_config, VENDOR_UID, Error, MIME_TYPE_PROTO, AgentDescriptor,
@@ -102,23 +104,53 @@ class ProtoFilterConfig(DataFilterConfig):
            and self.output_pipe_format.value.params.get('type') != self.input_pipe_format.value.params.get('type'):
                 raise Error(f"The 'type' parameter value must be the same for both MIME format options.")
         #
-        defined = 0
-        for opt in [self.include_func, self.exclude_func, self.include_expr, self.exclude_expr]:
-            if opt.value is not None:
-                defined += 1
-        if defined == 0:
+        values = {}
+        for func in [self.include_func, self.exclude_func]:
+            try:
+                values[func.name] = func.value
+            except Exception as exc:
+                raise Error(f"Invalid code definition in '{func.name}' option") from exc
+        for expr in [self.include_expr, self.exclude_expr]:
+            values[expr.name] = expr.value
+        #
+        if all(value is None for value in values.values()):
             raise Error("At least one filter specification option must have a value")
         #
         for func, expr in [(self.include_func, self.include_expr),
                            (self.exclude_func, self.exclude_expr)]:
-            if expr.value and func.value:
+            if values[expr.name] and values[func.name]:
                 raise Error(f"Options '{expr.name}' and '{func.name}' are mutually exclusive")
-        #
-        for func in [self.include_func, self.exclude_func]:
-            try:
-                func.value
-            except Exception as exc:
-                raise Error(f"Invalid code definition in '{func.name}' option") from exc
+    def build_predicate(self) -> Callable[[Any], bool]:
+        """Returns function that returns True for `data` accepted by both include and
+        exclude filter specifications.
+
+        Include and exclude expressions are compiled together into this single function,
+        while functions from '*_func' options are called from it.
+
+        Raises:
+            Error: When filter expressions could not be compiled.
+        """
+        ns = {'datetime': datetime}
+        parts = []
+        # Expressions are placed on separate lines, so trailing comments in them can't
+        # swallow the closing parenthesis
+        if self.include_func.value is not None:
+            ns['include_func'] = self.include_func.value
+            parts.append('include_func(data)')
+        elif self.include_expr.value is not None:
+            parts.append(f'(\n{self.include_expr.value}\n)')
+        if self.exclude_func.value is not None:
+            ns['exclude_func'] = self.exclude_func.value
+            parts.append('not exclude_func(data)')
+        elif self.exclude_expr.value is not None:
+            parts.append(f'not (\n{self.exclude_expr.value}\n)')
+        try:
+            code = compile(f"def predicate(data):\n    return {' and '.join(parts) or 'True'}",
+                           'predicate', 'exec')
+        except SyntaxError as exc:
+            raise Error("Invalid filter expression") from exc
+        eval(code, ns)
+        return ns['predicate']
 
 
 # Service description
@@ -44,7 +44,6 @@ This microservice is a DATA_FILTER:
 
 from __future__ import annotations
 from typing import Callable, Any
-import datetime
 from firebird.base.protobuf import create_message, is_msg_registered
 from saturnin.base import StopError, MIME, MIME_TYPE_PROTO, Channel
 from saturnin.lib.data.filter import DataFilterMicro, ErrorCode, FBDPSession, FBDPMessage
@@ -69,21 +68,10 @@ class ProtoFilterMicro(DataFilterMicro):
         super().initialize(config)
         self.log_context = 'main'
         #
-        self.include_func: Callable = None
-        self.exclude_func: Callable = None
         self.data: Any = None
         self.fmt: MIME = None
-        #
-        if config.include_expr.value is not None:
-            self.include_func = config.include_expr.value.get_callable('data',
-                                                                       {'datetime': datetime,})
-        if config.include_func.value is not None:
-            self.include_func = config.include_func.value
-        if config.exclude_expr.value is not None:
-            self.exclude_func = config.exclude_expr.value.get_callable('data',
-                                                                       {'datetime': datetime,})
-        if config.exclude_func.value is not None:
-            self.exclude_func = config.exclude_func.value
+        #: Combined include / exclude filter
+        self.predicate: Callable[[Any], bool] = config.build_predicate()
         #
         self.fmt = config.input_pipe_format.value
         proto_class = self.fmt.params.get('type')
@@ -173,8 +161,5 @@ class ProtoFilterMicro(DataFilterMicro):
             self.data.ParseFromString(data)
         except Exception as exc:
             raise StopError("Exception", code=ErrorCode.INVALID_DATA) from exc
-        if self.include_func and not self.include_func(self.data):
-            return
-        if self.exclude_func and self.exclude_func(self.data):
-            return
-        self.store_output(self.data.SerializeToString())
+        if self.predicate(self.data):
+            self.store_output(self.data.SerializeToString())
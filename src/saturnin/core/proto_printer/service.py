@@ -43,14 +43,59 @@ This microservice is a DATA_FILTER:
 """
 
 from __future__ import annotations
-from typing import Dict, Sequence, ItemsView, Callable, Any, cast
+import codecs
+from typing import Dict, Tuple, Sequence, ItemsView, Callable, Any, cast
+from types import CodeType
+from functools import lru_cache
 from google.protobuf.json_format import MessageToJson
+from google.protobuf.message import DecodeError
 from firebird.base.protobuf import create_message, is_msg_registered, get_enum_field_type, \
      get_enum_value_name
 from saturnin.base import StopError, MIME, MIME_TYPE_TEXT, MIME_TYPE_PROTO, Channel, SocketMode
 from saturnin.lib.data.filter import DataFilterMicro, ErrorCode, FBDPSession, FBDPMessage
 from .api import ProtoPrinterConfig
 
+#: MIME parameters accepted for output pipe format
+_ALLOWED_OUTPUT_PARAMS = frozenset(('charset', 'errors'))
+#: Enum type names for (message class, field name)
+_ENUM_FIELD_TYPES: Dict[Tuple[type, str], str] = {}
+
+# Functions
+
+def _enum_field_type(msg, field_name: str) -> str:
+    """Returns enum type name for message field. Result is cached per message class.
+    """
+    key = (type(msg), field_name)
+    if (result := _ENUM_FIELD_TYPES.get(key)) is None:
+        result = _ENUM_FIELD_TYPES[key] = get_enum_field_type(msg, field_name)
+    return result
+
+@lru_cache(maxsize=1024)
+def _enum_value_name(enum_type_name: str, value: Any) -> str:
+    """Returns name for the enum value. Result is cached.
+    """
+    return get_enum_value_name(enum_type_name, value)
+
+@lru_cache(maxsize=128)
+def _compile_fstring(fmt: str) -> CodeType:
+    """Returns code object that evaluates `fmt` as f-string.
+    """
+    return compile(f'f"""{fmt}"""', 'f-string', 'eval')
+
+def _is_literal(fmt: str) -> bool:
+    """Returns True if `fmt` evaluated as f-string is `fmt` itself, i.e. it contains no
+    replacement fields, brace or backslash escapes.
+    """
+    return '{' not in fmt and '}' not in fmt and '\\' not in fmt
+
+def _make_renderer(template: str) -> Callable[[Any, TransformationUtilities], str]:
+    """Returns function that formats `data` using `template` as f-string.
+    """
+    ns = {}
+    code = compile(f'def render(data, utils):\n    return f"""{template}"""', 'template', 'exec')
+    eval(code, ns)
+    return ns['render']
+
 # Classes
 
 class TransformationUtilities:
@@ -60,31 +105,31 @@ class TransformationUtilities:
     def msg_enum_name(self, msg, field_name: str) -> str:
         """Returns name for value of the enum field.
         """
-        return self.enum_name(get_enum_field_type(msg, field_name),
-                              getattr(msg, field_name))
+        return _enum_value_name(_enum_field_type(msg, field_name), getattr(msg, field_name))
     def enum_name(self, enum_type_name: str, value: Any) -> str:
         """Returns name for the enum value.
         """
-        return get_enum_value_name(enum_type_name, value)
+        return _enum_value_name(enum_type_name, value)
     def short_enum_name(self, msg, field_name: str) -> str:
         """Returns name for value of the enum field. If name contains '_', returns
         only name part after last underscore.
         """
-        name = get_enum_value_name(msg, field_name)
-        return name.rsplit('_',1)[1] if '_' in name else name
+        name = self.msg_enum_name(msg, field_name)
+        _, sep, tail = name.rpartition('_')
+        return tail if sep else name
     def value_list(self, values: Sequence, separator: str=',', end='', indent=' ') -> str:
         """Returns string with list of values from iterable.
         """
-        return separator.join(f"{indent}{value}" for value in values) + end
+        return separator.join([f"{indent}{value}" for value in values]) + end
     def items_list(self, items: ItemsView, separator: str=',', end='', indent=' ') -> str:
         """Returns string with list of key = value pairs from ItemsView.
         """
-        return separator.join(f"{indent}{key} = {value}" for key, value in items) + end
+        return separator.join([f"{indent}{key} = {value}" for key, value in items]) + end
     def formatted(self, fmt: str, context: Dict) -> str:
         """Returns `fmt` as f-string evaluated using values from `context` dictionary as locals.
         """
-        if context:
-            return eval(f'f"""{fmt}"""', globals(), context)
+        if context and not _is_literal(fmt):
+            return eval(_compile_fstring(fmt), globals(), context)
         return fmt
     def as_json(self, data: Any) -> str:
         """Returns message as JSON.
@@ -100,35 +145,29 @@ class ProtoPrinterMicro(DataFilterMicro):
         super().initialize(config)
         self.log_context = 'main'
         #
-        self.transform_func: Callable[[Any], str] = None
-        self.fmt: str = None
+        self.transform_func: Callable[[Any, TransformationUtilities], str] = None
         self.data: Any = None
-        self.charset = 'ascii'
-        self.errors = 'strict'
         self.utils = TransformationUtilities()
         #
         if config.input_pipe_format.value is not None:
             self.data = create_message(config.input_pipe_format.value.params.get('type'))
         #
         if config.template.value is not None:
-            self.transform_func = self.__format_data
-            self.fmt = 'f"""'+config.template.value+'"""'
+            self.transform_func = _make_renderer(config.template.value)
         else:
             self.transform_func = config.func.value
         #
         if self.output_pipe_mode is SocketMode.CONNECT:
             self.output_protocol.on_init_session = self.handle_init_session
-    def __format_data(self, data: Any, utils: TransformationUtilities) -> str:
-        """Uses format specification from configuration to produce text for output.
-        """
-        return eval(self.fmt, {'data': data, 'utils': utils})
     def handle_init_session(self, channel: Channel, session: FBDPSession) -> None:
         """Event executed from `send_open()` to set additional information to newly
         created session instance.
         """
         # cache attributes
-        session.charset = cast(MIME, session.data_format).params.get('charset', 'ascii')
-        session.errors = cast(MIME, session.data_format).params.get('errors', 'strict')
+        params = cast(MIME, session.data_format).params
+        session.charset = params.get('charset', 'ascii')
+        session.errors = params.get('errors', 'strict')
+        session.encode = codecs.getencoder(session.charset)
     def handle_input_accept_client(self, channel: Channel, session: FBDPSession) -> None:
         """Event handler executed when client connects to INPUT data pipe via OPEN message.
 
@@ -171,16 +210,18 @@ class ProtoPrinterMicro(DataFilterMicro):
         attribute containing the `ErrorCode` to be returned in CLOSE message.
         """
         super().handle_output_accept_client(channel, session)
-        if cast(MIME, session.data_format).mime_type != MIME_TYPE_TEXT:
-            raise StopError(f"MIME type '{cast(MIME, session.data_format).mime_type}' is not a valid output format",
+        fmt = cast(MIME, session.data_format)
+        params = fmt.params
+        if fmt.mime_type != MIME_TYPE_TEXT:
+            raise StopError(f"MIME type '{fmt.mime_type}' is not a valid output format",
+                            code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
+        if extra := params.keys() - _ALLOWED_OUTPUT_PARAMS:
+            raise StopError(f"Unknown MIME parameter '{next(iter(extra))}'",
                             code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
-        for param in cast(MIME, session.data_format).params.keys():
-            if param not in ('charset', 'errors'):
-                raise StopError(f"Unknown MIME parameter '{param}'",
-                                code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
         # cache attributes
-        session.charset = cast(MIME, session.data_format).params.get('charset', 'ascii')
-        session.errors = cast(MIME, session.data_format).params.get('errors', 'strict')
+        session.charset = params.get('charset', 'ascii')
+        session.errors = params.get('errors', 'strict')
+        session.encode = codecs.getencoder(session.charset)
     def handle_output_produce_data(self, channel: Channel, session: FBDPSession, msg: FBDPMessage) -> None:
         """Event handler executed to store data into outgoing DATA message.
 
@@ -208,7 +249,7 @@ class ProtoPrinterMicro(DataFilterMicro):
             raise StopError("EOF", code=ErrorCode.OK)
         data: str = self.output.popleft()
         try:
-            msg.data_frame = data.encode(encoding=self.charset, errors=self.errors)
+            msg.data_frame = session.encode(data, session.errors)[0]
         except UnicodeError as exc:
             raise StopError("UnicodeError", code=ErrorCode.INVALID_DATA) from exc
     def handle_input_accept_data(self, channel: Channel, session: FBDPSession, data: bytes) -> None:
@@ -235,9 +276,10 @@ class ProtoPrinterMicro(DataFilterMicro):
         """
         try:
             self.data.ParseFromString(data)
-        except Exception as exc:
+        except DecodeError as exc:
             raise StopError("Exception", code=ErrorCode.INVALID_DATA) from exc
         try:
-            self.store_output(self.transform_func(self.data, self.utils))
-        except Exception:
+            text = self.transform_func(self.data, self.utils)
+        except Exception as exc:
             raise StopError("Data formatting failed", code=ErrorCode.ERROR) from exc
+        self.store_output(text)
@@ -39,14 +39,60 @@ This microservice is a DATA_CONSUMER that wites blocks of text from input data p
 """
 
 from __future__ import annotations
-from typing import TextIO, cast
+from typing import BinaryIO, Callable, Dict, Any, cast
 import os
+import codecs
 from firebird.base.protobuf import create_message, is_msg_registered
 from saturnin.base import StopError, MIME, MIME_TYPE_TEXT, MIME_TYPE_PROTO, \
      FileOpenMode, Channel, SocketMode
 from saturnin.lib.data.onepipe import DataConsumerMicro, ErrorCode, FBDPSession, FBDPMessage
 from .api import TextWriterConfig, SUPPORTED_MIME
 
+#: Codecs that write BOM at the start of encoded output
+_BOM_CODECS = frozenset(('utf-16', 'utf-32', 'utf-8-sig'))
+#: Size of write buffer for output files
+_WRITE_BUFFER_SIZE = 256 * 1024
+#: True when newlines written into text file must be translated to `os.linesep`
+_TRANSLATE_NEWLINES = os.linesep != '\n'
+#: MIME parameters accepted for text input
+_ALLOWED_TEXT_PARAMS = frozenset(('charset', 'errors'))
+#: MIME parameters accepted for protobuf input
+_ALLOWED_PROTO_PARAMS = frozenset(('type',))
+
+#: Protobuf message classes for message type names
+_PROTO_CLASSES: Dict[str, type] = {}
+
+# Functions
+
+def _new_message(proto_class: str) -> Any:
+    """Returns new protobuf message instance. Message class is looked up in registry only
+    on first use of the message type name.
+    """
+    if (cls := _PROTO_CLASSES.get(proto_class)) is None:
+        msg = create_message(proto_class)
+        _PROTO_CLASSES[proto_class] = type(msg)
+        return msg
+    return cls()
+
+def _free_backup_name(filename: str) -> str:
+    """Returns '<filename>.<n>' name for backup of the file that is not used by other file.
+
+    Backups are expected to be numbered from 1 without gaps, so the first unused number
+    is found by exponential probing followed by binary search.
+    """
+    hi = 1
+    while os.path.isfile(f'{filename}.{hi}'):
+        hi *= 2
+    lo = hi // 2
+    # '<filename>.<lo>' exists (or lo is 0), '<filename>.<hi>' does not
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if os.path.isfile(f'{filename}.{mid}'):
+            lo = mid
+        else:
+            hi = mid
+    return f'{filename}.{hi}'
+
 # Classes
 
 class TextWriterMicro(DataConsumerMicro):
@@ -56,22 +102,15 @@ class TextWriterMicro(DataConsumerMicro):
     def _open_file(self) -> None:
         "Open the output file."
         self._close_file()
-        if self.filename.lower() in self.SYSIO:
-            fspec = self.SYSIO.index(self.filename.lower())
-        else:
-            fspec = self.filename
+        sysio = self._sysio
         if self.file_mode is FileOpenMode.CREATE:
             file_mode = 'x'
         elif self.file_mode is FileOpenMode.WRITE:
             file_mode = 'w'
         elif self.file_mode is FileOpenMode.RENAME:
             file_mode = 'w'
-            if isinstance(fspec, str) and os.path.isfile(self.filename):
-                i = 1
-                dest = f'{self.filename}.{i}'
-                while os.path.isfile(dest):
-                    i += 1
-                    dest = f'{self.filename}.{i}'
+            if not sysio and os.path.isfile(self.filename):
+                dest = _free_backup_name(self.filename)
                 try:
                     os.rename(self.filename, dest)
                 except Exception as exc:
@@ -79,26 +118,61 @@ class TextWriterMicro(DataConsumerMicro):
         elif self.file_mode is FileOpenMode.APPEND:
             file_mode = 'a'
         try:
-            self.file = open(fspec, mode=file_mode,
-                             encoding=self.file_format.params.get('charset', 'ascii'),
-                             errors=self.file_format.params.get('errors', 'strict'),
-                             closefd=self.filename.lower() not in self.SYSIO)
+            # Regular files get large write-behind buffer, standard streams are flushed
+            # after each DATA message to not delay the output
+            self.file = open(self._fspec, mode=file_mode + 'b',
+                             buffering=-1 if sysio else _WRITE_BUFFER_SIZE, closefd=not sysio)
         except Exception as exc:
             raise StopError("Failed to open output file") from exc
+        self._flush = self.file.flush if sysio else None
+        self._write = self.file.write
+        encoder = codecs.getincrementalencoder(self.charset)(self.errors)
+        try:
+            if self.file.seekable() and self.file.tell() != 0:
+                # Appending to existing content, so BOM must not be written again
+                encoder.setstate(0)
+        except OSError:
+            pass
+        if _TRANSLATE_NEWLINES:
+            def encode(text: str) -> bytes:
+                return encoder.encode(text.replace('\n', os.linesep))
+            self._encode = encode
+        else:
+            self._encode = encoder.encode
+    def _is_raw_text(self, session: FBDPSession) -> bool:
+        "Returns True if text received in session could be written without re-encoding."
+        return (not _TRANSLATE_NEWLINES and session.errors == 'strict'
+                and self._codec not in _BOM_CODECS
+                and codecs.lookup(session.charset).name == self._codec)
     def _close_file(self) -> None:
         "Close the output file if necessary."
         if self.file:
             self.file.close()
             self.file = None
+            self._write = None
+            self._encode = None
+            self._flush = None
     def initialize(self, config: TextWriterConfig) -> None:
         """Verify configuration and assemble component structural parts.
         """
         super().initialize(config)
         self.log_context = 'main'
         # Configuration
-        self.file: TextIO = None
+        self.file: BinaryIO = None
+        self._write: Callable[[bytes], int] = None
+        self._encode: Callable[[str], bytes] = None
+        self._flush: Callable[[], None] = None
         self.filename: str = config.filename.value
+        #: True when output is a standard stream
+        self._sysio: bool = self.filename.lower() in self.SYSIO
+        #: File name or descriptor passed to `open()`
+        self._fspec: str | int = self.SYSIO.index(self.filename.lower()) if self._sysio \
+            else self.filename
         self.file_format: MIME = config.file_format.value
+        self.charset: str = self.file_format.params.get('charset', 'ascii')
+        self.errors: str = self.file_format.params.get('errors', 'strict')
+        #: Normalized name of the output file codec
+        self._codec: str = codecs.lookup(self.charset).name
         self.file_mode: FileOpenMode = config.file_mode.value
         if self.pipe_mode is SocketMode.CONNECT:
             self.protocol.on_init_session = self.handle_init_session
@@ -116,28 +190,32 @@ class TextWriterMicro(DataConsumerMicro):
         attribute containing the `ErrorCode` to be returned in CLOSE message.
         """
         super().handle_accept_client(channel, session)
-        if cast(MIME, session.data_format).mime_type not in SUPPORTED_MIME:
-            raise StopError(f"MIME type '{cast(MIME, session.data_format).mime_type}' is not a valid input format",
+        fmt = cast(MIME, session.data_format)
+        params = fmt.params
+        if fmt.mime_type not in SUPPORTED_MIME:
+            raise StopError(f"MIME type '{fmt.mime_type}' is not a valid input format",
                             code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
-        if cast(MIME, session.data_format).mime_type == MIME_TYPE_TEXT:
-            for param in cast(MIME, session.data_format).params.keys():
-                if param not in ('charset', 'errors'):
-                    raise StopError(f"Unknown MIME parameter '{param}'",
-                                    code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
+        if fmt.mime_type == MIME_TYPE_TEXT:
+            if extra := params.keys() - _ALLOWED_TEXT_PARAMS:
+                raise StopError(f"Unknown MIME parameter '{next(iter(extra))}'",
+                                code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
             # cache attributes
-            session.charset = cast(MIME, session.data_format).params.get('charset', 'ascii')
-            session.errors = cast(MIME, session.data_format).params.get('errors', 'strict')
-        elif cast(MIME, session.data_format).mime_type == MIME_TYPE_PROTO:
-            for param in cast(MIME, session.data_format).params.keys():
-                if param != 'type':
-                    raise StopError(f"Unknown MIME parameter '{param}'",
-                                    code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
-            proto_class = cast(MIME, session.data_format).params.get('type')
+            session.charset = params.get('charset', 'ascii')
+            session.errors = params.get('errors', 'strict')
+            session.is_proto = False
+            session.raw_text = self._is_raw_text(session)
+        elif fmt.mime_type == MIME_TYPE_PROTO:
+            if extra := params.keys() - _ALLOWED_PROTO_PARAMS:
+                raise StopError(f"Unknown MIME parameter '{next(iter(extra))}'",
+                                code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
+            proto_class = params.get('type')
             if not is_msg_registered(proto_class):
                 raise StopError(f"Unknown protobuf message type '{proto_class}'",
                                 code = ErrorCode.DATA_FORMAT_NOT_SUPPORTED)
             # cache attributes
-            session.proto = create_message(proto_class)
+            session.proto = _new_message(proto_class)
+            session.parse = session.proto.ParseFromString
+            session.is_proto = True
         # Client reqest is ok, we'll open the file we are configured to work with.
         self._open_file()
     def handle_accept_data(self, channel: Channel, session: FBDPSession, data: bytes) -> None:
@@ -160,17 +238,21 @@ class TextWriterMicro(DataConsumerMicro):
         """
         if self.file is None:
             self._open_file()
-        if session.data_format.mime_type == MIME_TYPE_PROTO:
+        if session.is_proto:
             try:
-                session.proto.ParseFromString(data)
+                session.parse(data)
             except Exception as exc:
                 raise StopError("Protobuf error", code=ErrorCode.INVALID_DATA) from exc
-            self.file.write(str(session.proto))
+            self._write(self._encode(str(session.proto)))
         else:
             try:
-                self.file.write(data.decode(encoding=session.charset, errors=session.errors))
+                text = data.decode(encoding=session.charset, errors=session.errors)
+                # Valid data in file charset could be written as received
+                self._write(data if session.raw_text else self._encode(text))
             except UnicodeError as exc:
                 raise StopError("UnicodeError", code=ErrorCode.INVALID_DATA) from exc
+        if self._flush is not None:
+            self._flush()
     def handle_pipe_closed(self, channel: Channel, session: FBDPSession, msg: FBDPMessage,
                            exc: Exception=None) -> None:
         """Event handler executed when CLOSE message is received or sent, to release any
@@ -189,8 +271,14 @@ class TextWriterMicro(DataConsumerMicro):
         created session instance.
         """
         # cache attributes
-        if cast(MIME, session.data_format).mime_type == MIME_TYPE_TEXT:
-            session.charset = cast(MIME, session.data_format).params.get('charset', 'ascii')
-            session.errors = cast(MIME, session.data_format).params.get('errors', 'strict')
-        elif cast(MIME, session.data_format).mime_type == MIME_TYPE_PROTO:
-            session.proto = create_message(cast(MIME, session.data_format).params.get('type'))
+        fmt = cast(MIME, session.data_format)
+        params = fmt.params
+        if fmt.mime_type == MIME_TYPE_TEXT:
+            session.charset = params.get('charset', 'ascii')
+            session.errors = params.get('errors', 'strict')
+            session.is_proto = False
+            session.raw_text = self._is_raw_text(session)
+        elif fmt.mime_type == MIME_TYPE_PROTO:
+            session.proto = _new_message(params.get('type'))
+            session.parse = session.proto.ParseFromString
+            session.is_proto = True
@@ -0,0 +1,100 @@
+# SPDX-FileCopyrightText: 2019-present The Firebird Project <www.firebirdsql.org>
+#
+# SPDX-License-Identifier: MIT
+#
+# PROGRAM/MODULE: Saturnin microservices
+# FILE:           tests/test_binary_reader.py
+# DESCRIPTION:    Tests for Binary data file reader microservice
+
+"""Tests for Binary data file reader microservice.
+"""
+
+from __future__ import annotations
+import os
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+import zmq
+from saturnin.base import StopError
+from saturnin.lib.data.onepipe import ErrorCode
+from saturnin.core.binary_reader.api import SERVICE_DESCRIPTOR
+from saturnin.core.binary_reader.service import BinaryReaderMicro
+
+def make_service(filename: str, block_size: int, use_mmap: bool=False) -> BinaryReaderMicro:
+    "Returns initialized service."
+    config = SERVICE_DESCRIPTOR.config()
+    config.pipe.set_as_str('pipe')
+    config.pipe_address.set_as_str('inproc://pipe')
+    config.pipe_mode.set_as_str('bind')
+    config.filename.set_value(filename)
+    config.block_size.set_value(block_size)
+    config.use_mmap.set_value(use_mmap)
+    config.validate()
+    service = BinaryReaderMicro(zmq.Context.instance(), SERVICE_DESCRIPTOR)
+    service.initialize(config)
+    return service
+
+def produce(service: BinaryReaderMicro) -> bytes | None:
+    "Returns data of next DATA message, or None at end of file."
+    msg = SimpleNamespace(data_frame=None)
+    try:
+        service.handle_produce_data(None, None, msg)
+    except StopError as exc:
+        assert exc.code is ErrorCode.OK
+        return None
+    return bytes(msg.data_frame)
+
+def produce_all(service: BinaryReaderMicro) -> list[bytes]:
+    "Returns data of all DATA messages."
+    result = []
+    while (data := produce(service)) is not None:
+        result.append(data)
+    service._close_file()
+    return result
+
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_fixed_blocks(tmp_path, use_mmap):
+    filename = tmp_path / 'data.bin'
+    filename.write_bytes(b'abcdefghij')
+    service = make_service(str(filename), 4, use_mmap)
+    assert produce_all(service) == [b'abcd', b'efgh', b'ij']
+
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_prefixed_blocks(tmp_path, use_mmap):
+    filename = tmp_path / 'data.bin'
+    filename.write_bytes(b'\x00\x00\x00\x03abc\x00\x00\x00\x02de')
+    service = make_service(str(filename), -1, use_mmap)
+    assert produce_all(service) == [b'abc', b'de']
+
+def test_truncated_file(tmp_path):
+    filename = tmp_path / 'data.bin'
+    filename.write_bytes(b'x' * 2 * 1024 * 1024)
+    service = make_service(str(filename), 1024 * 1024)
+    assert len(produce(service)) == 1024 * 1024
+    os.truncate(filename, 0)
+    assert produce(service) is None
+    service._close_file()
+
+@pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason="Named pipes not supported")
+def test_fifo_block_not_delayed(tmp_path):
+    filename = tmp_path / 'data.fifo'
+    os.mkfifo(filename)
+    received = threading.Event()
+    def writer():
+        with open(filename, 'wb') as fifo:
+            fifo.write(b'x' * 100)
+            fifo.flush()
+            received.wait(2)
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        service = make_service(str(filename), 100)
+        start = time.monotonic()
+        assert produce(service) == b'x' * 100
+        assert time.monotonic() - start < 1
+    finally:
+        received.set()
+        thread.join()
+    assert produce(service) is None
+    service._close_file()
@@ -0,0 +1,76 @@
+# SPDX-FileCopyrightText: 2019-present The Firebird Project <www.firebirdsql.org>
+#
+# SPDX-License-Identifier: MIT
+#
+# PROGRAM/MODULE: Saturnin microservices
+# FILE:           tests/test_fb_trace_parse.py
+# DESCRIPTION:    Tests for Firebird trace parser microservice
+
+"""Tests for Firebird trace parser microservice.
+"""
+
+from __future__ import annotations
+import datetime
+from decimal import Decimal
+import zmq
+from firebird.base.protobuf import create_message
+from firebird.lib.trace import (ParamSet, EventFreeStatement, EventCloseCursor,
+                                EventServiceQuery, Status)
+from saturnin.core.fb_trace_parse.api import SERVICE_DESCRIPTOR, TRACE_FORMAT, TRACE_PROTO
+from saturnin.core.fb_trace_parse.service import FbTraceParserMicro
+
+def make_service() -> FbTraceParserMicro:
+    "Returns initialized service."
+    config = SERVICE_DESCRIPTOR.config()
+    config.input_pipe.set_as_str('pipe-in')
+    config.input_pipe_address.set_as_str('inproc://pipe-in')
+    config.input_pipe_mode.set_as_str('connect')
+    config.input_pipe_format.set_as_str('text/plain;charset=utf-8')
+    config.output_pipe.set_as_str('pipe-out')
+    config.output_pipe_address.set_as_str('inproc://pipe-out')
+    config.output_pipe_mode.set_as_str('bind')
+    config.output_pipe_format.set_as_str(TRACE_FORMAT)
+    config.validate()
+    service = FbTraceParserMicro(zmq.Context.instance(), SERVICE_DESCRIPTOR)
+    service.initialize(config)
+    return service
+
+def test_param_set():
+    service = make_service()
+    # Parameter values as returned by TraceParser
+    data = ParamSet(par_id=3,
+                    params=[('integer', 10), ('varchar', 'abc'), ('smallint', None),
+                            ('double precision', Decimal('1.5')),
+                            ('date', datetime.datetime(2020, 1, 2)),
+                            ('time', datetime.datetime(1900, 1, 1, 3, 4, 5, 6)),
+                            ('timestamp', datetime.datetime(2020, 1, 2, 3, 4, 5))])
+    entry = create_message(TRACE_PROTO)
+    entry.ParseFromString(service._serialize_entry(data))
+    assert entry.WhichOneof('entry') == 'params'
+    assert entry.params.id == 3
+    assert [(p.type, p.value) for p in entry.params.param] == \
+        [('integer', '10'), ('varchar', 'abc'), ('smallint', '<NULL>'),
+         ('double precision', '1.5'), ('date', '2020-01-02'), ('time', '03:04:05.000006'),
+         ('timestamp', '2020-01-02T03:04:05.000000')]
+
+def test_statement_free_and_cursor_close():
+    service = make_service()
+    timestamp = datetime.datetime(2020, 1, 2, 3, 4, 5)
+    for event, member in [(EventFreeStatement, 'stm_free'), (EventCloseCursor, 'cursor_close')]:
+        data = event(event_id=1, timestamp=timestamp, attachment_id=2, statement_id=3, sql_id=4)
+        entry = create_message(TRACE_PROTO)
+        entry.ParseFromString(service._serialize_entry(data))
+        assert entry.WhichOneof('entry') == member
+        value = getattr(entry, member)
+        assert (value.att_id, value.stm_id, value.sql_id) == (2, 3, 4)
+
+def test_service_query():
+    service = make_service()
+    data = EventServiceQuery(event_id=1, timestamp=datetime.datetime(2020, 1, 2, 3, 4, 5),
+                             status=Status.OK, service_id=2, action='Query',
+                             sent=['isc_info_svc_get_env'], received=['isc_info_svc_line'])
+    entry = create_message(TRACE_PROTO)
+    entry.ParseFromString(service._serialize_entry(data))
+    assert entry.WhichOneof('entry') == 'svc_query'
+    assert (entry.svc_query.svc_id, entry.svc_query.action) == (2, 'Query')
+    assert list(entry.svc_query.params) == ['isc_info_svc_get_env']
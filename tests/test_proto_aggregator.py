@@ -0,0 +1,96 @@
+# SPDX-FileCopyrightText: 2019-present The Firebird Project <www.firebirdsql.org>
+#
+# SPDX-License-Identifier: MIT
+#
+# PROGRAM/MODULE: Saturnin microservices
+# FILE:           tests/test_proto_aggregator.py
+# DESCRIPTION:    Tests for Protobuf data aggregator microservice
+
+"""Tests for Protobuf data aggregator microservice.
+"""
+
+from __future__ import annotations
+import pytest
+import zmq
+from firebird.base.protobuf import create_message
+from saturnin.base import StopError
+from saturnin.core.proto_aggregator.api import SERVICE_DESCRIPTOR, AGGREGATE_PROTO
+from saturnin.core.proto_aggregator.service import ProtoAggregatorMicro
+
+def make_config(group_by: str, aggregate: str):
+    "Returns validated service configuration."
+    config = SERVICE_DESCRIPTOR.config()
+    config.input_pipe.set_as_str('pipe-in')
+    config.input_pipe_address.set_as_str('inproc://pipe-in')
+    config.input_pipe_mode.set_as_str('connect')
+    config.input_pipe_format.set_as_str(f'application/x.fb.proto;type={AGGREGATE_PROTO}')
+    config.output_pipe.set_as_str('pipe-out')
+    config.output_pipe_address.set_as_str('inproc://pipe-out')
+    config.output_pipe_mode.set_as_str('bind')
+    config.group_by.set_as_str(group_by)
+    config.aggregate.set_as_str(aggregate)
+    config.validate()
+    return config
+
+def make_service(config) -> ProtoAggregatorMicro:
+    "Returns initialized service."
+    service = ProtoAggregatorMicro(zmq.Context.instance(), SERVICE_DESCRIPTOR)
+    service.initialize(config)
+    # Output is collected without waking the output pipe
+    service.store_batch_output = service.output.extend
+    return service
+
+def make_record(**values) -> bytes:
+    "Returns serialized input record."
+    record = create_message(AGGREGATE_PROTO)
+    record.data.update(values)
+    return record.SerializeToString()
+
+def aggregate_rows(service: ProtoAggregatorMicro, rows: list[dict]) -> dict:
+    "Sends rows to service input and returns output rows keyed by 'kind' field."
+    for row in rows:
+        service.input_protocol.on_accept_data(None, None, make_record(**row))
+    service.finish_input_processing(None, None, None)
+    result = {}
+    for data in service.output:
+        record = create_message(AGGREGATE_PROTO)
+        record.ParseFromString(data)
+        values = dict(record.data)
+        result[values['kind']] = values
+    return result
+
+ROWS = [{'kind': 'a', 'size': 1}, {'kind': 'b', 'size': 10}, {'kind': 'a', 'size': 5}]
+
+def test_initialize():
+    service = make_service(make_config("kind:data.data['kind']",
+                                       "count:data, sum as total:data.data['size']"))
+    assert service.input_protocol.on_accept_data.is_set()
+
+def test_aggregate():
+    service = make_service(make_config("kind:data.data['kind']",
+                                       "count:data, min:data.data['size'], "
+                                       "max:data.data['size'], sum:data.data['size'], "
+                                       "avg:data.data['size']"))
+    result = aggregate_rows(service, ROWS)
+    assert result == {'a': {'kind': 'a', 'count': 2, 'min': 1, 'max': 5, 'sum': 6, 'avg': 3},
+                      'b': {'kind': 'b', 'count': 1, 'min': 10, 'max': 10, 'sum': 10,
+                            'avg': 10}}
+
+def test_function_name_case():
+    service = make_service(make_config("kind:data.data['kind']",
+                                       "COUNT:data, Sum AS total:data.data['size']"))
+    result = aggregate_rows(service, ROWS)
+    assert result == {'a': {'kind': 'a', 'COUNT': 2, 'total': 6},
+                      'b': {'kind': 'b', 'COUNT': 1, 'total': 10}}
+
+def test_spec_with_comment():
+    service = make_service(make_config("kind:data.data['kind']  # group",
+                                       "count:data  # rows, sum as total:data.data['size'] # sum"))
+    result = aggregate_rows(service, ROWS)
+    assert result == {'a': {'kind': 'a', 'count': 2, 'total': 6},
+                      'b': {'kind': 'b', 'count': 1, 'total': 10}}
+
+def test_invalid_data():
+    service = make_service(make_config("kind:data.data['kind']", "count:data"))
+    with pytest.raises(StopError):
+        service.input_protocol.on_accept_data(None, None, b'\xff\xff')
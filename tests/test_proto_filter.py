@@ -0,0 +1,48 @@
+# SPDX-FileCopyrightText: 2019-present The Firebird Project <www.firebirdsql.org>
+#
+# SPDX-License-Identifier: MIT
+#
+# PROGRAM/MODULE: Saturnin microservices
+# FILE:           tests/test_proto_filter.py
+# DESCRIPTION:    Tests for Protobuf data filter microservice
+
+"""Tests for Protobuf data filter microservice.
+"""
+
+from __future__ import annotations
+from types import SimpleNamespace
+from saturnin.core.proto_filter.api import SERVICE_DESCRIPTOR
+
+def make_config(**options):
+    "Returns service configuration with filter options set from strings."
+    config = SERVICE_DESCRIPTOR.config()
+    for name, value in options.items():
+        getattr(config, name).set_as_str(value)
+    return config
+
+def accepted(config, *codes: int) -> list[int]:
+    "Returns codes accepted by predicate built from configuration."
+    predicate = config.build_predicate()
+    return [code for code in codes if predicate(SimpleNamespace(code=code))]
+
+def test_include_expr():
+    config = make_config(include_expr='data.code > 3')
+    assert accepted(config, 1, 4, 5) == [4, 5]
+
+def test_exclude_expr():
+    config = make_config(exclude_expr='data.code == 4')
+    assert accepted(config, 1, 4, 5) == [1, 5]
+
+def test_include_and_exclude_expr():
+    config = make_config(include_expr='data.code > 3', exclude_expr='data.code == 4')
+    assert accepted(config, 1, 4, 5) == [5]
+
+def test_expr_with_comment():
+    config = make_config(include_expr='data.code > 3  # big codes',
+                         exclude_expr='data.code == 4  # skip four')
+    assert accepted(config, 1, 4, 5) == [5]
+
+def test_include_func():
+    config = make_config(include_func='def f(data: Any) -> bool:\n    return data.code % 2 == 1\n',
+                         exclude_expr='data.code == 5')
+    assert accepted(config, 1, 2, 3, 5) == [1, 3]
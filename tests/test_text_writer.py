@@ -0,0 +1,76 @@
+# SPDX-FileCopyrightText: 2019-present The Firebird Project <www.firebirdsql.org>
+#
+# SPDX-License-Identifier: MIT
+#
+# PROGRAM/MODULE: Saturnin microservices
+# FILE:           tests/test_text_writer.py
+# DESCRIPTION:    Tests for Text file writer microservice
+
+"""Tests for Text file writer microservice.
+"""
+
+from __future__ import annotations
+from types import SimpleNamespace
+import pytest
+import zmq
+from firebird.base.protobuf import create_message
+from saturnin.core.text_writer.api import SERVICE_DESCRIPTOR
+from saturnin.core.text_writer.service import TextWriterMicro
+
+def make_service(filename: str, charset: str, file_mode: str='write') -> TextWriterMicro:
+    "Returns initialized service."
+    config = SERVICE_DESCRIPTOR.config()
+    config.pipe.set_as_str('pipe')
+    config.pipe_address.set_as_str('inproc://pipe')
+    config.pipe_mode.set_as_str('bind')
+    config.pipe_format.set_as_str('text/plain;charset=utf-8')
+    config.filename.set_value(filename)
+    config.file_format.set_as_str(f'text/plain;charset={charset}')
+    config.file_mode.set_as_str(file_mode)
+    config.validate()
+    service = TextWriterMicro(zmq.Context.instance(), SERVICE_DESCRIPTOR)
+    service.initialize(config)
+    return service
+
+def write_text(service: TextWriterMicro, *blocks: str) -> None:
+    "Writes text blocks received as UTF-8 data into output file, and closes it."
+    session = SimpleNamespace(is_proto=False, charset='utf-8', errors='strict')
+    session.raw_text = service._is_raw_text(session)
+    for block in blocks:
+        service.handle_accept_data(None, session, block.encode('utf-8'))
+    service._close_file()
+
+def expected_text(filename, charset: str, file_mode: str, *blocks: str) -> bytes:
+    "Returns content of file written by text file object."
+    with open(filename, mode=file_mode, encoding=charset) as file:
+        for block in blocks:
+            file.write(block)
+    return filename.read_bytes()
+
+@pytest.mark.parametrize('charset', ['utf-8', 'utf-16', 'utf-8-sig', 'latin-1'])
+def test_write(tmp_path, charset):
+    filename = tmp_path / 'output.txt'
+    write_text(make_service(str(filename), charset), 'abc\n', 'dáta\n')
+    assert filename.read_bytes() == expected_text(tmp_path / 'expected.txt', charset, 'w',
+                                                  'abc\n', 'dáta\n')
+
+@pytest.mark.parametrize('charset', ['utf-8', 'utf-16', 'utf-32', 'utf-8-sig'])
+def test_append(tmp_path, charset):
+    filename = tmp_path / 'output.txt'
+    write_text(make_service(str(filename), charset, 'append'), 'first\n')
+    write_text(make_service(str(filename), charset, 'append'), 'second\n')
+    expected = tmp_path / 'expected.txt'
+    expected_text(expected, charset, 'a', 'first\n')
+    assert filename.read_bytes() == expected_text(expected, charset, 'a', 'second\n')
+
+def test_write_proto(tmp_path):
+    filename = tmp_path / 'output.txt'
+    service = make_service(str(filename), 'utf-8')
+    proto = create_message('saturnin.core.protobuf.GenericDataRecord')
+    proto.sequence = 1
+    proto.data.update({'number': 1, 'text': 'dáta'})
+    session = SimpleNamespace(is_proto=True, proto=proto, parse=proto.ParseFromString)
+    service.handle_accept_data(None, session, proto.SerializeToString())
+    service._close_file()
+    assert filename.read_bytes() == expected_text(tmp_path / 'expected.txt', 'utf-8', 'w',
+                                                  str(proto))